@@ -1,10 +1,20 @@
+import io
 import re
+import bisect
 import os
 import sys
+import json
+import types
+import hashlib
 import inspect
+import tempfile
 import itertools
+import traceback
+import contextlib
+import collections
+import multiprocessing
 
-from fnmatch import fnmatch
+from fnmatch import translate
 
 from pygments import highlight
 from pygments.token import Comment, Text, String, Keyword, Name, Operator
@@ -14,6 +24,7 @@ from pygments.formatters import Terminal256Formatter, HtmlFormatter
 
 import baron
 import baron.path
+from baron.utils import is_newline, split_on_newlines
 from baron.utils import python_version, string_instance
 from baron.render import nodes_rendering_order
 
@@ -26,6 +37,162 @@ else:
     from StringIO import StringIO
 
 
+def _get_node_plans(node_type):
+    """
+    Return a dict of the attributes describing the nodes of type 'node_type',
+    computed once from nodes_rendering_order instead of filtering it on
+    every use:
+
+    * _str_keys, _list_keys and _dict_keys: the keys of the node by kind
+    * _init_plan: (kind, key) of every key, in rendering order
+    * _find_plan: (kind, key) of the keys .find() goes down into
+    * _find_all_plan: (kind, key) of the keys .find_all() goes down into
+    * _rendering_plan: (kind, key) of every item of the rendering order
+    * _dumps_plan: (kind, key, dependents) of the items that can be rendered,
+      'dependents' being the keys that all have to be set for the item to be
+      rendered
+    """
+    str_keys, list_keys, dict_keys = ["type"], [], []
+    init_plan = []
+    for kind, key, _ in nodes_rendering_order[node_type]:
+        if kind == "constant" or key in str_keys + list_keys + dict_keys:
+            continue
+
+        if kind == "key":
+            dict_keys.append(key)
+        elif kind in ("bool", "string"):
+            str_keys.append(key)
+        elif kind in ("list", "formatting"):
+            list_keys.append(key)
+        else:
+            raise Exception(str((node_type, kind, key)))
+
+        init_plan.append((kind, key))
+
+    return {
+        "_str_keys": tuple(str_keys),
+        "_list_keys": tuple(list_keys),
+        "_dict_keys": tuple(dict_keys),
+        "_init_plan": tuple(init_plan),
+        "_find_plan": tuple(x for x in init_plan if x[0] in ("list", "key")),
+        "_find_all_plan": tuple(x for x in init_plan if x[0] in ("list", "formatting", "key")),
+        "_rendering_plan": tuple((kind, key) for kind, key, _ in nodes_rendering_order[node_type]),
+        "_dumps_plan": tuple(
+            (kind, key, () if dependent is True else (dependent,) if isinstance(dependent, string_instance) else tuple(dependent))
+            for kind, key, dependent in nodes_rendering_order[node_type] if dependent and kind != "bool"
+        ),
+    }
+
+
+# number of keys, "type" excepted, of the node type that has the most of them
+_max_node_keys = max(len(_get_node_plans(x)["_init_plan"]) for x in nodes_rendering_order)
+
+# node type -> class used for the nodes of this type, see register_node_class
+_node_classes = {}
+
+# (node class, node type) -> identifiers of these nodes, see
+# Node._get_identifiers
+_node_identifiers = {}
+
+# identifier -> its bit in the masks of Node._get_subtree_mask
+_identifier_bits = {}
+
+# (node class, method name) -> whether the class redefines this method of
+# Node, see _overrides
+_node_overrides = {}
+
+
+def _get_identifiers_mask(identifiers):
+    """
+    Return the mask with the bits of every identifier of 'identifiers' set.
+    """
+    mask = 0
+    for identifier in identifiers:
+        bit = _identifier_bits.get(identifier)
+        if bit is None:
+            bit = _identifier_bits[identifier] = 1 << len(_identifier_bits)
+        mask |= bit
+
+    return mask
+
+
+def _get_children(node, plan, empty_keys=False):
+    """
+    Return the nodes directly under 'node', in the order of 'plan', the name
+    of one of the plans of _get_node_plans. Like .find() and .find_all(), the
+    empty nodes (see Node.__len__) set on keys are left out unless
+    'empty_keys' is True.
+    """
+    children = []
+    for kind, key in getattr(node, plan):
+        target = getattr(node, key)
+        if kind == "key":
+            if isinstance(target, Node) and (empty_keys or target):
+                children.append(target)
+            continue
+
+        if isinstance(target, ProxyList):
+            target = target.node_list
+        if isinstance(target, NodeList):
+            target = target.data
+        children.extend(target)
+
+    return children
+
+
+def _walk_tree(node, plan, prune=None, empty_keys=False):
+    """
+    Yield 'node' and the nodes under it (see _get_children) depth first, in
+    the order a recursive walk would, but with an explicit stack so that
+    deeply nested code doesn't hit the recursion limit. The nodes for which
+    'prune' returns True are skipped with everything under them.
+    """
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if prune is not None and prune(node):
+            continue
+
+        yield node
+
+        children = _get_children(node, plan, empty_keys)
+        children.reverse()
+        stack.extend(children)
+
+
+def _run_nested(steps):
+    """
+    Run the generator 'steps' and, each time it yields another generator,
+    run that one before resuming it, like nested function calls, but with an
+    explicit stack so that deeply nested code doesn't hit the recursion
+    limit. This is used to build things from the nodes under a node before
+    finishing with the node itself (see Node._init_steps).
+    """
+    stack = [steps]
+    while stack:
+        for nested in stack[-1]:
+            stack.append(nested)
+            break
+        else:
+            stack.pop()
+
+
+def _overrides(klass, name):
+    """
+    Tell if the Node subclass 'klass' redefines the Node method 'name', in
+    which case it has to be called instead of the nested steps of Node.
+    """
+    overrides = _node_overrides.get((klass, name))
+    if overrides is None:
+        overrides = _node_overrides[(klass, name)] = getattr(klass, name) != getattr(Node, name)
+
+    return overrides
+
+
+def _node_class_name(node_type):
+    return "".join(map(lambda x: x.capitalize(), node_type.split("_"))) + "Node"
+
+
 def in_a_shell():
     # the isinstance here is for building sphinx doc
     if isinstance(sys.stdout, StringIO):
@@ -49,6 +216,114 @@ def indent(block_of_text, indentation):
     return "\n".join(map(lambda x: indentation + x, block_of_text.split("\n")))
 
 
+def _compile_attribute_query(query):
+    """
+    Return a function telling if an attribute matches 'query', which can be a
+    value, a "re:" or "g:" string, a regex, a list, a tuple or a callable.
+    """
+    if isinstance(query, string_instance) and query.startswith("re:"):
+        query = re.compile(query[3:])
+
+    if callable(query):
+        return query
+
+    if isinstance(query, string_instance) and query.startswith("g:"):
+        # what fnmatch does, without translating the glob for every attribute
+        match = re.compile(translate(os.path.normcase(query[2:]))).match
+        return lambda attribute: match(os.path.normcase(attribute)) is not None
+
+    if isinstance(query, re._pattern_type):
+        return query.match
+
+    if isinstance(query, (list, tuple)):
+        return lambda attribute: attribute in query
+
+    return lambda attribute: attribute == query
+
+
+class Query(object):
+    """
+    A query of .find() and .find_all() whose identifier, regexes, globs and
+    keyword arguments are only interpreted once, see compile_query().
+    """
+    def __init__(self, identifier, *args, **kwargs):
+        if isinstance(identifier, string_instance) and not identifier.startswith("re:"):
+            identifier = identifier.lower()
+
+        # the identifier when it's a plain string, see match and
+        # RedBaron.find_all
+        self.identifier = identifier if isinstance(identifier, string_instance) and not identifier.startswith(("re:", "g:")) else None
+        self._identifier_test = _compile_attribute_query(identifier)
+
+        # mask of the identifiers that can match, if known, see excludes
+        self._identifiers_mask = None
+        if self.identifier is not None:
+            self._identifiers_mask = _get_identifiers_mask([self.identifier])
+        elif isinstance(identifier, (list, tuple)):
+            self._identifiers_mask = _get_identifiers_mask([x for x in identifier if isinstance(x, string_instance)])
+
+        self._default_value_test = None
+        if args and isinstance(args[0], (string_instance, re._pattern_type, list, tuple)):
+            self._default_value_test = _compile_attribute_query(args[0])
+            args = args[1:]
+
+        self._node_tests = args
+        self._key_tests = [(key, _compile_attribute_query(value)) for key, value in kwargs.items()]
+
+    def match(self, node):
+        if self.identifier is not None:
+            if self.identifier not in node._get_identifiers()[0]:
+                return False
+
+        elif not any(map(self._identifier_test, node._generate_identifiers())):
+            return False
+
+        if self._default_value_test is not None and not self._default_value_test(getattr(node, node._default_test_value)):
+            return False
+
+        for test in self._node_tests:
+            if not test(node):
+                return False
+
+        if self._key_tests:
+            all_my_keys = node._str_keys + node._list_keys + node._dict_keys
+
+            for key, test in self._key_tests:
+                if key not in all_my_keys or not test(getattr(node, key)):
+                    return False
+
+        return True
+
+    def excludes(self, node):
+        """
+        Return True if neither 'node' nor any node under it can match, going
+        by the identifiers found under it (see Node._get_subtree_mask).
+        """
+        return self._identifiers_mask is not None and not self._identifiers_mask & node._get_subtree_mask()
+
+
+def compile_query(identifier, *args, **kwargs):
+    """
+    Interpret the arguments of a .find() or .find_all() once and return a
+    Query that can be given instead to .find(), .find_all() and their aliases,
+    to run the same query many times.
+    """
+    return Query(identifier, *args, **kwargs)
+
+
+def _get_query(identifier, args, kwargs):
+    """
+    Return the Query given to .find() or .find_all() or built from their
+    arguments, and their 'recursive' option (removed from 'kwargs').
+    """
+    recursive = kwargs.pop("recursive", True)
+
+    if isinstance(identifier, Query):
+        return identifier, recursive
+
+    return Query(identifier, *args, **kwargs), recursive
+
+
 class Path(object):
     """Holds the path to a FST node
 
@@ -68,15 +343,35 @@ class Path(object):
         self.node = None
         self.node = node
 
-        parent = node
-        path = []
-        while parent is not None:
-            key = Path.get_holder_on_attribute(parent)
+        # the paths of the holders are cached on the root of the tree until
+        # its structure is modified, so only the missing part of the path
+        # has to be computed
+        holders = []
+        holder = node
+        while holder is not None:
+            holders.append(holder)
+            holder = Path.get_holder(holder)
+
+        top = holders[-1]
+        if isinstance(top, ProxyList):
+            top = top.node_list
+        if top._paths is None:
+            top._paths = {}
+        paths = top._paths
+
+        path = ()
+        for holder in reversed(holders):
+            if id(holder) in paths:
+                path = paths[id(holder)][1]
+                continue
+
+            key = Path.get_holder_on_attribute(holder)
             if key is not None:
-                path.insert(0, key)
-            parent = Path.get_holder(parent)
+                path += (key,)
+            # the holder is kept so its id can't be reused while in the cache
+            paths[id(holder)] = (holder, path)
 
-        self.path = path
+        self.path = list(path)
 
     @classmethod
     def from_baron_path(class_, node, path):
@@ -128,20 +423,117 @@ class Path(object):
             parent = parent.node_list
 
         if isinstance(parent, NodeList):
+            if isinstance(node, Node):
+                return node._get_position_in(parent)
             pos = parent.index(node.node_list if isinstance(node, ProxyList) else node)
             return pos
 
+        keys = [key for _, key in parent._rendering_plan]
+
         if isinstance(node, NodeList):
-            return next((key for (_, key, _) in parent._render() if getattr(parent, key) is node or getattr(getattr(parent, key), "node_list", None) is node), None)
+            if node.on_attribute in keys:
+                value = getattr(parent, node.on_attribute)
+                if value is node or getattr(value, "node_list", None) is node:
+                    return node.on_attribute
 
-        to_return = next((key for (_, key, _) in parent._render() if key == node.on_attribute), None)
-        return to_return
+            return next((key for key in keys if getattr(parent, key) is node or getattr(getattr(parent, key), "node_list", None) is node), None)
+
+        return node.on_attribute if node.on_attribute in keys else None
+
+
+class _BoundingBoxesFinder(baron.path.PathWalker):
+    """
+    Compute in a single rendering pass the absolute bounding box of every
+    path of a tree, like baron.path.path_to_bounding_box would for each of
+    them.
+    """
+    def compute(self, tree):
+        self.line, self.column = 1, 1
+        self.left_of_current_position = (1, 0)
+        self.top_lefts = {}
+        self.bottom_rights = {}
+
+        self.walk(tree)
+
+        return self.top_lefts, self.bottom_rights, self.left_of_current_position
+
+    def before(self, key_type, item, render_key):
+        stop = super(_BoundingBoxesFinder, self).before(key_type, item, render_key)
+
+        if render_key is not None:
+            self.top_lefts[tuple(self.current_path)] = (self.line, self.column)
+
+        if key_type not in ('constant', 'string'):
+            return stop
+
+        for c in split_on_newlines(item):
+            if is_newline(c):
+                self.line, self.column = self.line + 1, 1
+                self.left_of_current_position = (self.line, 0)
+            elif c != "":
+                self.column += len(c)
+                self.left_of_current_position = (self.line, self.column - 1)
+
+        return stop
+
+    def after(self, key_type, item, render_key):
+        if render_key is not None:
+            self.bottom_rights.setdefault(tuple(self.current_path), self.left_of_current_position)
+
+        return super(_BoundingBoxesFinder, self).after(key_type, item, render_key)
+
+
+class _PositionsIndexer(baron.path.PathWalker):
+    """
+    List, in a single rendering pass, every piece of a line rendered by a
+    tree with its path, sorted by position, so the node at a given position
+    can be found by bisection instead of walking the tree like
+    baron.path.position_to_path does.
+    """
+    def compute(self, tree):
+        self.line, self.column = 1, 1
+        self.starts = []
+        self.ends = []
+        self.paths = []
+
+        self.walk(tree)
+
+        return self.starts, self.ends, self.paths
+
+    def before_constant(self, constant, key):
+        for c in split_on_newlines(constant):
+            if is_newline(c):
+                self.line, self.column = self.line + 1, 1
+            elif c != "":
+                self.starts.append((self.line, self.column))
+                self.ends.append(self.column + len(c))
+                self.paths.append(list(self.current_path))
+                self.column += len(c)
+
+    before_string = before_constant
 
 
 class GenericNodesUtils(object):
     """
     Mixen top class for Node and NodeList that contains generic methods that are used by both.
     """
+    __slots__ = ()
+
+    # see _get_rendering_order, get_indentation_node and Path, only set on
+    # the root of a tree
+    _rendering_order = None
+    _indentation_nodes = None
+    _paths = None
+    _bounding_boxes = None
+    # see find_by_positions, can be set on any node
+    _positions_index = None
+    # see Node._dump_to, only set on nodes
+    _rendered = None
+    # see Node._get_subtree_mask, only set on nodes
+    _subtree_mask = None
+    # number of modifications made to any tree, see CommaProxyList
+    _modifications = 0
+
     def _convert_input_to_node_object(self, value, parent, on_attribute, generic=False):
         if isinstance(value, string_instance):
             if generic:
@@ -199,11 +591,60 @@ class GenericNodesUtils(object):
     @property
     def absolute_bounding_box(self):
         path = self.path().to_baron_path()
-        return baron.path.path_to_bounding_box(self.root.fst(), path)
+        return self.root._get_absolute_bounding_box(path)
+
+    def _get_absolute_bounding_box(self, path):
+        """
+        Return the absolute bounding box of 'path' in this tree (like
+        baron.path.path_to_bounding_box(self.fst(), path)).
+
+        The bounding boxes of every path are computed in one pass and cached
+        on the root of the tree until it is modified.
+        """
+        _, holder = self._get_top()
+        if holder._bounding_boxes is None:
+            holder._bounding_boxes = _BoundingBoxesFinder().compute(self.fst())
+
+        top_lefts, bottom_rights, end = holder._bounding_boxes
+
+        if not path:
+            return baron.path.BoundingBox(((1, 1), end))
+
+        path = tuple(path)
+        if path not in top_lefts:
+            return baron.path.BoundingBox((None, None))
+
+        return baron.path.BoundingBox((top_lefts[path], bottom_rights[path]))
 
     def find_by_position(self, position):
-        path = Path.from_baron_path(self, baron.path.position_to_path(self.fst(), position))
-        return path.node if path else None
+        return self.find_by_positions([position])[0]
+
+    def find_by_positions(self, positions):
+        """
+        Return the list of the nodes located at each of the (line, column)
+        'positions', like calling .find_by_position() on each of them.
+
+        The positions of the rendered pieces of this node are indexed in one
+        pass and the index is kept until this node is modified, so each
+        lookup is a bisection.
+        """
+        holder = self.node_list if isinstance(self, ProxyList) else self
+        if holder._positions_index is None:
+            holder._positions_index = _PositionsIndexer().compute(self.fst())
+
+        starts, ends, paths = holder._positions_index
+
+        to_return = []
+        for line, column in positions:
+            index = bisect.bisect_right(starts, (line, column)) - 1
+            if index >= 0 and starts[index][0] == line and column < ends[index]:
+                path = Path.from_baron_path(self, paths[index])
+            else:
+                path = Path.from_baron_path(self, None)
+
+            to_return.append(path.node if path else None)
+
+        return to_return
 
     def _string_to_node_list(self, string, parent, on_attribute):
         return NodeList.from_fst(baron.parse(string), parent=parent, on_attribute=on_attribute)
@@ -233,6 +674,38 @@ class GenericNodesUtils(object):
 
         return result
 
+    def _drop_caches(self, structural=True):
+        if structural and self._rendering_order is not None:
+            self._rendering_order = None
+        if structural and self._indentation_nodes is not None:
+            self._indentation_nodes = None
+        if structural and self._paths is not None:
+            self._paths = None
+        if self._bounding_boxes is not None:
+            self._bounding_boxes = None
+        if self._positions_index is not None:
+            self._positions_index = None
+        if self._rendered is not None:
+            self._rendered = None
+        if structural and self._subtree_mask is not None:
+            self._subtree_mask = None
+
+    def _on_modification(self, structural=True):
+        """
+        Called each time the tree is modified under this node: walk up to the
+        root so every cache built on this part of the tree is dropped.
+
+        'structural' is False when only a string has been replaced by another
+        one (like the indent of an endl node), which doesn't change which
+        nodes are in the tree nor their order.
+        """
+        GenericNodesUtils._modifications += 1
+
+        target = self
+        while target is not None:
+            target._drop_caches(structural)
+            target = target.parent
+
     @property
     def root(self):
         current = self
@@ -240,27 +713,108 @@ class GenericNodesUtils(object):
             current = current.parent
         return current
 
+    def _get_top(self):
+        """
+        Return (top, holder): the root of the tree this node belongs to and
+        the object on which the caches of the whole tree are stored. For a
+        RedBaron instance, it's its root NodeList since it's the one notified
+        when it is modified directly.
+        """
+        top = self
+        while top.parent is not None:
+            top = top.parent
+
+        return top, top.node_list if isinstance(top, ProxyList) else top
+
+    def _get_rendering_order(self):
+        """
+        Return (order, positions, spans) for the whole tree this node belongs
+        to: 'order' is the list of the nodes of the tree in rendering order
+        (like _generate_nodes_in_rendering_order), 'positions' maps the id of
+        a node to the indexes where it appears in 'order' and 'spans' maps
+        the id of a node or a NodeList to the (start, end) slice of 'order'
+        it renders.
+
+        This is computed once and stored on the root of the tree until the
+        structure of the tree is modified.
+        """
+        top, holder = self._get_top()
+
+        if holder._rendering_order is None:
+            order = []
+            positions = {}
+            spans = {}
+
+            def walk(node):
+                # a generator yielding the walks of the nodes under 'node',
+                # see _run_nested
+                start = len(order)
+
+                if isinstance(node, NodeList):
+                    for i in node:
+                        yield walk(i)
+
+                elif isinstance(node, Node):
+                    for kind, key in node._rendering_plan if node.type == "endl" else (("constant", None),) + node._rendering_plan:
+                        if kind == "constant" or (kind == "string" and isinstance(getattr(node, key), string_instance)):
+                            if not order or order[-1] is not node:
+                                positions.setdefault(id(node), []).append(len(order))
+                                order.append(node)
+                        elif kind == "key":
+                            yield walk(getattr(node, key))
+                        elif kind in ("list", "formatting"):
+                            target = getattr(node, key)
+                            if isinstance(target, ProxyList):
+                                target = target.node_list
+                            if isinstance(target, NodeList):
+                                yield walk(target)
+                            else:
+                                for i in target:
+                                    yield walk(i)
+
+                else:
+                    return
+
+                spans[id(node)] = (start, len(order))
+
+            _run_nested(walk(holder))
+            spans[id(top)] = spans[id(holder)]
+            holder._rendering_order = (order, positions, spans)
+
+        return holder._rendering_order
+
     def _iter_in_rendering_order(self, node):
-        if not isinstance(node, (Node, NodeList)):
-            return
-        if not (isinstance(node, Node) and node.type == "endl"):
-            yield node
-        for kind, key, display in node._render():
-            if kind == "constant":
+        # what is left to do, last first: (False, node) to walk a node,
+        # (True, node) to yield it, instead of recursing
+        stack = [(False, node)]
+        while stack:
+            rendered, node = stack.pop()
+            if rendered:
                 yield node
-            elif kind == "string":
-                if isinstance(getattr(node, key), string_instance):
-                    yield node
-            elif kind == "key":
-                for i in self._iter_in_rendering_order(getattr(node, key)):
-                    yield i
-            elif kind in ("list", "formatting"):
-                target = getattr(node, key)
-                if isinstance(target, ProxyList):
-                    target = target.node_list
-                for i in target:
-                    for j in self._iter_in_rendering_order(i):
-                        yield j
+                continue
+
+            if not isinstance(node, (Node, NodeList)):
+                continue
+
+            todo = []
+            if not (isinstance(node, Node) and node.type == "endl"):
+                todo.append((True, node))
+            for kind, key in node._rendering_plan:
+                if kind == "constant":
+                    todo.append((True, node))
+                elif kind == "string":
+                    if isinstance(getattr(node, key), string_instance):
+                        todo.append((True, node))
+                elif kind == "key":
+                    todo.append((False, getattr(node, key)))
+                elif kind in ("list", "formatting"):
+                    target = getattr(node, key)
+                    if isinstance(target, ProxyList):
+                        target = target.node_list
+                    todo.extend((False, i) for i in target)
+
+            todo.reverse()
+            stack.extend(todo)
 
 
 class NodeList(UserList, GenericNodesUtils):
@@ -273,15 +827,18 @@ class NodeList(UserList, GenericNodesUtils):
         super(NodeList, self).__init__(initlist)
         self.parent = parent
         self.on_attribute = on_attribute
+        self._update_positions()
 
     @classmethod
-    def from_fst(klass, node_list, parent=None, on_attribute=None):
-        return klass(map(lambda x: Node.from_fst(x, parent=parent, on_attribute=on_attribute), node_list), parent=parent, on_attribute=on_attribute)
+    def from_fst(klass, node_list, parent=None, on_attribute=None, lazy=False):
+        return klass(map(lambda x: Node.from_fst(x, parent=parent, on_attribute=on_attribute, lazy=lazy), node_list), parent=parent, on_attribute=on_attribute)
 
 
     def find(self, identifier, *args, **kwargs):
+        query, recursive = _get_query(identifier, args, kwargs)
+
         for i in self.data:
-            candidate = i.find(identifier, *args, **kwargs)
+            candidate = i.find(query, recursive=recursive)
             if candidate is not None:
                 return candidate
 
@@ -289,14 +846,91 @@ class NodeList(UserList, GenericNodesUtils):
         return self.find(key)
 
     def __setitem__(self, key, value):
+        start = self._get_start_position(key)
         self.data[key] = self._convert_input_to_node_object(value, parent=self.parent, on_attribute=self.on_attribute)
+        self._update_positions(start)
+        self._on_modification()
 
-    def find_all(self, identifier, *args, **kwargs):
-        to_return = NodeList([])
-        for i in self.data:
-            to_return += i.find_all(identifier, *args, **kwargs)
+    def __delitem__(self, key):
+        start = self._get_start_position(key)
+        super(NodeList, self).__delitem__(key)
+        self._update_positions(start)
+        self._on_modification()
+
+    def __iadd__(self, other):
+        start = len(self.data)
+        to_return = super(NodeList, self).__iadd__(other)
+        self._update_positions(start)
+        self._on_modification()
+        return to_return
+
+    def append(self, item):
+        super(NodeList, self).append(item)
+        self._update_positions(len(self.data) - 1)
+        self._on_modification()
+
+    def insert(self, i, item):
+        start = self._get_start_position(i)
+        super(NodeList, self).insert(i, item)
+        self._update_positions(start)
+        self._on_modification()
+
+    def pop(self, i=-1):
+        start = self._get_start_position(i)
+        to_return = super(NodeList, self).pop(i)
+        self._update_positions(start)
+        self._on_modification()
         return to_return
 
+    def remove(self, item):
+        super(NodeList, self).remove(item)
+        self._update_positions()
+        self._on_modification()
+
+    def extend(self, other):
+        start = len(self.data)
+        super(NodeList, self).extend(other)
+        self._update_positions(start)
+        self._on_modification()
+
+    def _get_start_position(self, key):
+        """
+        Return the first position of this list affected by a modification
+        at 'key', an index or a slice.
+        """
+        if isinstance(key, slice):
+            key = key.start if key.start is not None and key.step is None else 0
+
+        return key + len(self.data) if key < 0 else key
+
+    def _update_positions(self, start=0):
+        """
+        Store on the nodes of this list, from 'start', their position in it
+        so .next, .previous and .index_on_parent don't have to search it.
+
+        Only done for the list owning its nodes (the list attribute of a
+        node), not for the lists returned by queries or slices.
+        """
+        if self.on_attribute is None:
+            return
+
+        data = self.data
+        for position in range(max(0, min(start, len(data) - 1)), len(data)):
+            if isinstance(data[position], Node):
+                object.__setattr__(data[position], "_position", position)
+
+    def find_all(self, identifier, *args, **kwargs):
+        return NodeList(list(self.iter_find_all(identifier, *args, **kwargs)))
+
+    def iter_find_all(self, identifier, *args, **kwargs):
+        """
+        Return an iterator over what .find_all() returns, the nodes being only
+        looked for as it is consumed.
+        """
+        query, recursive = _get_query(identifier, args, kwargs)
+
+        return itertools.chain.from_iterable(i.iter_find_all(query, recursive=recursive) for i in self.data)
+
     findAll = find_all
     __call__ = find_all
 
@@ -311,7 +945,20 @@ class NodeList(UserList, GenericNodesUtils):
         return [x.fst() for x in self.data]
 
     def dumps(self):
-        return baron.dumps(self.fst())
+        to_return = []
+        self._dump_to(to_return.append)
+        return "".join(to_return)
+
+    def dump(self, fp):
+        """
+        Write the source code of the nodes to the file object 'fp' as it is
+        rendered, without building it as a whole string first.
+        """
+        self._dump_to(fp.write)
+
+    def _dump_to(self, write):
+        for node in self.data:
+            node._dump_to(write)
 
     def __repr__(self):
         if in_a_shell():
@@ -361,8 +1008,10 @@ class NodeList(UserList, GenericNodesUtils):
         return [x.__help__(deep=deep, with_formatting=with_formatting) for x in self.data]
 
     def copy(self):
-        # XXX not very optimised but at least very simple
-        return NodeList(map(Node.from_fst, self.fst()))
+        return self._copy(parent=None, on_attribute=None)
+
+    def _copy(self, parent, on_attribute):
+        return NodeList([x._copy(parent, on_attribute) for x in self.data], parent=parent, on_attribute=on_attribute)
 
     def next_generator(self):
         # similary, NodeList will never have next items
@@ -391,6 +1040,16 @@ class NodeList(UserList, GenericNodesUtils):
     def filtered(self):
         return tuple([x for x in self.data if not isinstance(x, (EndlNode, CommaNode, DotNode))])
 
+    def _first_filtered(self):
+        """
+        Return the first node of .filtered() (or None) without building it.
+        """
+        for x in self.data:
+            if not isinstance(x, (EndlNode, CommaNode, DotNode)):
+                return x
+
+        return None
+
     def _generate_nodes_in_rendering_order(self):
         previous = None
         for i in self:
@@ -404,7 +1063,7 @@ class NodeList(UserList, GenericNodesUtils):
         if index >= len(self.data) or index < 0:
             raise IndexError()
         path = self.path().to_baron_path() + [index]
-        return baron.path.path_to_bounding_box(self.root.fst(), path)
+        return self.root._get_absolute_bounding_box(path)
 
     def increase_indentation(self, number_of_spaces):
         previous = None
@@ -427,46 +1086,154 @@ class NodeList(UserList, GenericNodesUtils):
                 previous = node
 
 
+def _get_last_rendered_in_list(node_list, end=None):
+    """
+    Return the last node rendered by the items of 'node_list' (only the ones
+    before 'end' if given), None if they don't render any node.
+    """
+    if isinstance(node_list, ProxyList):
+        node_list = node_list.node_list
+    if isinstance(node_list, NodeList):
+        node_list = node_list.data
+
+    for position in range(len(node_list) if end is None else end, 0, -1):
+        if isinstance(node_list[position - 1], Node):
+            last = node_list[position - 1]._get_last_rendered()
+            if last is not None:
+                return last
+
+    return None
+
+
 class Node(GenericNodesUtils):
+    # The values of the keys of a node are stored in the generic "_slot_N"
+    # slots: every node class gets, for the keys of its node type, class
+    # attributes aliasing those slots (see _set_node_class_keys). Since every
+    # node class shares the same layout, .replace() can still change the
+    # class of a node.
+    __slots__ = ("init", "_pending_fst", "_position", "_rendered", "_subtree_mask", "parent", "on_attribute", "type", "__dict__", "__weakref__") + tuple("_slot_%s" % x for x in range(_max_node_keys))
+
     _other_identifiers = []
     _default_test_value = "value"
+    _node_type = None
+    _str_keys = ("type",)
+    _list_keys = ()
+    _dict_keys = ()
+    _init_plan = ()
+    _find_plan = ()
+    _find_all_plan = ()
+    _rendering_plan = ()
+    _dumps_plan = ()
+
+    def __init__(self, node, parent=None, on_attribute=None, lazy=False):
+        _run_nested(self._init_steps(node, parent, on_attribute, lazy))
+
+    def _init_steps(self, node, parent, on_attribute, lazy):
+        """
+        The body of __init__, as a generator yielding the steps building the
+        nodes under this one (see _run_nested) instead of building them
+        recursively.
+        """
+        # __setattr__ expects those 2 to exist
+        object.__setattr__(self, "init", True)
+        # when lazy, children are kept as raw fst and only converted into
+        # Node/NodeList on first access, see _materialize
+        object.__setattr__(self, "_pending_fst", {} if lazy else None)
+        # position in the list owning this node, see NodeList._update_positions
+        object.__setattr__(self, "_position", None)
+        # source code of the node, see _dump_to
+        object.__setattr__(self, "_rendered", None)
+        # identifiers found under the node, see _get_subtree_mask
+        object.__setattr__(self, "_subtree_mask", None)
 
-    def __init__(self, node, parent=None, on_attribute=None):
-        self.init = True
         self.parent = parent
         self.on_attribute = on_attribute
-        self._str_keys = ["type"]
-        self._list_keys = []
-        self._dict_keys = []
         self.type = node["type"]
-        for kind, key, _ in filter(lambda x: x[0] != "constant", self._render()):
-            if kind == "key":
+
+        if self.type != self._node_type:
+            # this isn't the class of this node type (for example a base Node
+            # instance), the keys and plans are stored on the instance
+            for name, value in _get_node_plans(self.type).items():
+                setattr(self, name, value)
+
+        for kind, key in self._init_plan:
+            if lazy and kind in ("key", "list", "formatting"):
+                # a setter of a previous key might have already set this
+                # attribute, the fst value has to win like in eager mode
+                try:
+                    object.__delattr__(self, key)
+                except AttributeError:
+                    pass
+                self._pending_fst[key] = node[key]
+
+            elif kind == "key":
                 if node[key]:
-                    setattr(self, key, Node.from_fst(node[key], parent=self, on_attribute=key))
+                    child, steps = Node._from_fst_steps(node[key], self, key, lazy)
+                    yield steps
+                    setattr(self, key, child)
                 else:
                     setattr(self, key, None)
-                self._dict_keys.append(key)
 
             elif kind in ("bool", "string"):
                 setattr(self, key, node[key])
-                self._str_keys.append(key)
 
             elif kind in ("list", "formatting"):
-                setattr(self, key, NodeList.from_fst(node[key], parent=self, on_attribute=key))
-                self._list_keys.append(key)
+                children = []
+                for fst in node[key]:
+                    child, steps = Node._from_fst_steps(fst, self, key, lazy)
+                    yield steps
+                    children.append(child)
+                setattr(self, key, NodeList(children, parent=self, on_attribute=key))
 
             else:
                 raise Exception(str((node["type"], kind, key)))
 
         self.init = False
 
+    @staticmethod
+    def _get_node_class(node_type):
+        node_class = _node_classes.get(node_type)
+        if node_class is None:
+            # a node type added to nodes_rendering_order after the import
+            node_class = type(_node_class_name(node_type), (Node,), {"__slots__": ()})
+            register_node_class(node_type, node_class)
+
+        return node_class
+
     @classmethod
-    def from_fst(klass, node, parent=None, on_attribute=None):
-        class_name = "".join(map(lambda x: x.capitalize(), node["type"].split("_"))) + "Node"
-        if class_name in globals():
-            return globals()[class_name](node, parent=parent, on_attribute=on_attribute)
-        else:
-            return type(class_name, (Node,), {})(node, parent=parent, on_attribute=on_attribute)
+    def from_fst(klass, node, parent=None, on_attribute=None, lazy=False):
+        return Node._get_node_class(node["type"])(node, parent=parent, on_attribute=on_attribute, lazy=lazy)
+
+    @staticmethod
+    def _from_fst_steps(node, parent, on_attribute, lazy):
+        """
+        Return (new node, steps): what from_fst returns, but only initialized
+        once the generator 'steps' has been run (see _run_nested).
+        """
+        node_class = Node._get_node_class(node["type"])
+        if _overrides(node_class, "__init__"):
+            return node_class(node, parent=parent, on_attribute=on_attribute, lazy=lazy), iter(())
+
+        new = node_class.__new__(node_class)
+        return new, new._init_steps(node, parent, on_attribute, lazy)
+
+    def _materialize(self, key):
+        """
+        Convert the raw fst of the child stored on 'key' into RedBaron
+        objects. Only used for nodes built with lazy=True.
+        """
+        fst = self._pending_fst.pop(key)
+
+        init, self.init = self.init, True
+        try:
+            if key in self._list_keys:
+                setattr(self, key, NodeList.from_fst(fst, parent=self, on_attribute=key, lazy=True))
+            elif fst:
+                setattr(self, key, Node.from_fst(fst, parent=self, on_attribute=key, lazy=True))
+            else:
+                setattr(self, key, None)
+        finally:
+            self.init = init
 
 
     @property
@@ -476,14 +1243,28 @@ class Node(GenericNodesUtils):
         if in_list is None:
             return None
 
-        next_node = list(itertools.dropwhile(lambda x: x is not self, in_list))[1:]
-        return next_node[0] if next_node else None
+        position = self._get_position_in(in_list)
+        if position is None or position + 1 >= len(in_list.data):
+            return None
+
+        return in_list.data[position + 1]
 
     @property
     def next_rendered(self):
+        order, positions, spans = self._get_rendering_order()
         previous = None
         target = self.parent
         while target is not None:
+            if id(self) in positions and id(target) in spans:
+                start, end = spans[id(target)]
+                for position in reversed(positions[id(self)]):
+                    if start <= position < end - 1:
+                        return order[position + 1]
+
+                target = target.parent
+                continue
+
+            # not reachable from the root, fallback on rendering the parents
             for i in reversed(list(target._generate_nodes_in_rendering_order())):
                 if i is self and previous is not None:
                     return previous
@@ -498,9 +1279,11 @@ class Node(GenericNodesUtils):
         if in_list is None:
             return None
 
-        generator = itertools.dropwhile(lambda x: x is not self, in_list)
-        next(generator)
-        return generator
+        position = self._get_position_in(in_list)
+        if position is None:
+            return iter([])
+
+        return (in_list.data[x] for x in range(position + 1, len(in_list.data)))
 
     @property
     def previous(self):
@@ -509,14 +1292,33 @@ class Node(GenericNodesUtils):
         if in_list is None:
             return None
 
-        next_node = list(itertools.dropwhile(lambda x: x is not self, reversed(in_list)))[1:]
-        return next_node[0] if next_node else None
+        position = self._get_position_in(in_list)
+        if not position:
+            return None
+
+        return in_list.data[position - 1]
 
     @property
     def previous_rendered(self):
+        if self.parent is not None:
+            found, previous = self._get_previous_rendered_in_parent()
+            if found:
+                return previous
+
+        order, positions, spans = self._get_rendering_order()
         previous = None
         target = self.parent
         while target is not None:
+            if id(self) in positions and id(target) in spans:
+                start, end = spans[id(target)]
+                for position in positions[id(self)]:
+                    if start <= position < end:
+                        return order[position - 1] if position > start else None
+
+                target = target.parent
+                continue
+
+            # not reachable from the root, fallback on rendering the parents
             for i in target._generate_nodes_in_rendering_order():
                 if i is self:
                     return previous
@@ -524,28 +1326,155 @@ class Node(GenericNodesUtils):
 
             target = target.parent
 
+    def _get_previous_rendered_in_parent(self):
+        """
+        Return (found, previous): whether this node is rendered by its parent
+        and, if so, the node rendered just before it by the parent, found by
+        only looking at what precedes it in the rendering plan of the parent.
+        """
+        if self.type == "endl":
+            # an endl node is rendered after its formatting
+            for index, (kind, key) in enumerate(self._rendering_plan):
+                if kind == "constant" or (kind == "string" and isinstance(getattr(self, key), string_instance)):
+                    break
+
+            previous = self._get_last_rendered(end=index)
+            if previous is not None:
+                return True, previous
+
+        target = self.parent
+        if isinstance(target, ProxyList):
+            target = target.node_list
+
+        if isinstance(target, NodeList):
+            position = self._get_position_in(target)
+            if position is None:
+                return False, None
+
+            return True, _get_last_rendered_in_list(target, position)
+
+        for index, (kind, key) in enumerate(target._rendering_plan):
+            if key != self.on_attribute:
+                continue
+
+            if kind == "key" and getattr(target, key) is self:
+                return True, target._get_last_rendered(end=index)
+
+            if kind in ("list", "formatting"):
+                in_list = getattr(target, key)
+                if isinstance(in_list, ProxyList):
+                    in_list = in_list.node_list
+
+                if isinstance(in_list, NodeList):
+                    position = self._get_position_in(in_list)
+                else:
+                    position = next((x for x, i in enumerate(in_list) if i is self), None)
+
+                if position is not None:
+                    return True, target._get_last_rendered(end=index, list_end=position)
+
+        return False, None
+
+    def _get_last_rendered(self, end=None, list_end=None):
+        """
+        Return the last node yielded by _iter_in_rendering_order(self), or
+        the last one yielded for the items of the rendering plan before 'end'
+        (and, if 'list_end' is given, for the items before it in the list
+        at 'end').
+        """
+        plan = self._rendering_plan
+
+        if end is None:
+            end = len(plan)
+        elif list_end is not None:
+            last = _get_last_rendered_in_list(getattr(self, plan[end][1]), list_end)
+            if last is not None:
+                return last
+
+        # the nodes being looked into, each with what's left of its rendering
+        # to go through backwards, instead of recursing
+        stack = [self._iter_rendered_backwards(end)]
+        while stack:
+            for rendered, node in stack[-1]:
+                if rendered:
+                    return node
+                stack.append(node._iter_rendered_backwards())
+                break
+            else:
+                stack.pop()
+
+        return None
+
+    def _iter_rendered_backwards(self, end=None):
+        """
+        Go backwards through the items of the rendering plan before 'end',
+        yielding (True, self) for the ones rendering this node and
+        (False, node) for the nodes under it, see _get_last_rendered.
+        """
+        for kind, key in reversed(self._rendering_plan[:end]):
+            if kind == "constant":
+                yield True, self
+
+            elif kind == "string":
+                if isinstance(getattr(self, key), string_instance):
+                    yield True, self
+
+            elif kind == "key":
+                child = getattr(self, key)
+                if isinstance(child, Node):
+                    yield False, child
+
+            elif kind in ("list", "formatting"):
+                target = getattr(self, key)
+                if isinstance(target, ProxyList):
+                    target = target.node_list
+                if isinstance(target, NodeList):
+                    target = target.data
+                for i in reversed(target):
+                    if isinstance(i, Node):
+                        yield False, i
+
+        if self.type != "endl":
+            yield True, self
+
     def previous_generator(self):
         in_list = self._get_list_attribute_is_member_off()
 
         if in_list is None:
             return None
 
-        generator = itertools.dropwhile(lambda x: x is not self, reversed(in_list))
-        next(generator)
-        return generator
+        position = self._get_position_in(in_list)
+        if position is None:
+            return iter([])
+
+        return (in_list.data[x] for x in range(position - 1, -1, -1))
 
     def get_indentation_node(self):
         if self.type == "endl":
             # by convention, an endl node will always have this indentation
             return None
 
-        if self.previous_rendered is None:
-            return None
+        # cached until the structure of the tree changes, the indent of the
+        # endl node is read on each call
+        _, holder = self._get_top()
+        if holder._indentation_nodes is None:
+            holder._indentation_nodes = {}
+        elif id(self) in holder._indentation_nodes:
+            return holder._indentation_nodes[id(self)][1]
 
-        if self.previous_rendered.type == "endl":
-            return self.previous_rendered
+        previous_rendered = self.previous_rendered
 
-        return self.previous_rendered.get_indentation_node()
+        if previous_rendered is None:
+            indentation_node = None
+        elif previous_rendered.type == "endl":
+            indentation_node = previous_rendered
+        else:
+            indentation_node = previous_rendered.get_indentation_node()
+
+        # the node is kept so its id can't be reused while in the cache
+        holder._indentation_nodes[id(self)] = (self, indentation_node)
+
+        return indentation_node
 
     @property
     def indentation(self):
@@ -581,42 +1510,62 @@ class Node(GenericNodesUtils):
 
         return in_list
 
+    def _get_position_in(self, node_list):
+        """
+        Return the position of this node in 'node_list' or None if it isn't
+        in it.
+
+        This is O(1) when 'node_list' is the list owning this node, using the
+        position it has stored on it. Otherwise (or if the list has been
+        modified behind its back) the list is searched.
+        """
+        data = node_list.data
+        position = self._position
+
+        if position is not None and position < len(data) and data[position] is self:
+            return position
+
+        node_list._update_positions()
+        position = self._position
+
+        if position is not None and position < len(data) and data[position] is self:
+            return position
+
+        for position, i in enumerate(data):
+            if i is self:
+                return position
+
+        return None
+
 
     def find(self, identifier, *args, **kwargs):
-        if "recursive" in kwargs:
-            recursive = kwargs["recursive"]
-            kwargs = kwargs.copy()
-            del kwargs["recursive"]
-        else:
-            recursive = True
+        query, recursive = _get_query(identifier, args, kwargs)
 
-        if self._node_match_query(self, identifier, *args, **kwargs):
+        if recursive and query.excludes(self):
+            return None
+
+        if query.match(self):
             return self
 
         if not recursive:
             return None
 
-        for kind, key, _ in filter(lambda x: x[0] in ("list", "key"), self._render()):
-            if kind == "key":
-                i = getattr(self, key)
-                if not i:
-                    continue
+        # like the recursive .find() of the nodes under this one did, an
+        # empty node that matches is skipped with the nodes under it
+        for node in _walk_tree(self, "_find_plan", lambda x: query.excludes(x) or (query.match(x) and not x)):
+            if query.match(node):
+                return node
 
-                found = i.find(identifier, *args, **kwargs)
-                if found:
-                    return found
+    def __getattr__(self, key):
+        if key in ("init", "_pending_fst"):
+            # __init__ hasn't been called (yet)
+            raise AttributeError(key)
 
-            elif kind == "list":
-                attr = getattr(self, key).node_list if isinstance(getattr(self, key), ProxyList) else getattr(self, key)
-                for i in attr:
-                    found = i.find(identifier, *args, **kwargs)
-                    if found:
-                        return found
+        pending_fst = self._pending_fst
+        if pending_fst and key in pending_fst:
+            self._materialize(key)
+            return getattr(self, key)
 
-            else:
-                raise Exception()
-
-    def __getattr__(self, key):
         if key.endswith("_") and key[:-1] in self._dict_keys + self._list_keys + self._str_keys:
             return getattr(self, key[:-1])
 
@@ -672,76 +1621,49 @@ class Node(GenericNodesUtils):
             raise AttributeError("__delitem__")
 
     def find_all(self, identifier, *args, **kwargs):
-        to_return = NodeList([])
-        if "recursive" in kwargs:
-            recursive = kwargs["recursive"]
-            kwargs = kwargs.copy()
-            del kwargs["recursive"]
-        else:
-            recursive = True
+        return NodeList(list(self.iter_find_all(identifier, *args, **kwargs)))
 
-        if self._node_match_query(self, identifier, *args, **kwargs):
-            to_return.append(self)
+    def iter_find_all(self, identifier, *args, **kwargs):
+        """
+        Return an iterator over what .find_all() returns, the nodes being only
+        looked for as it is consumed.
+        """
+        query, recursive = _get_query(identifier, args, kwargs)
 
         if not recursive:
-            return to_return
-
-        for kind, key, _ in filter(lambda x: x[0] in ("list", "formatting") or (x[0] == "key" and isinstance(getattr(self, x[1]), Node)), self._render()):
-            if kind == "key":
-                i = getattr(self, key)
-                if not i:
-                    continue
-
-                to_return += i.find_all(identifier, *args, **kwargs)
-
-            elif kind in ("list", "formatting"):
-                if isinstance(getattr(self, key), ProxyList):
-                    for i in getattr(self, key).node_list:
-                        to_return += i.find_all(identifier, *args, **kwargs)
-                else:
-                    for i in getattr(self, key):
-                        to_return += i.find_all(identifier, *args, **kwargs)
+            return iter([self] if query.match(self) else [])
 
-            else:
-                raise Exception()
+        return self._iter_find_all(query)
 
-        return to_return
+    def _iter_find_all(self, query):
+        return (x for x in _walk_tree(self, "_find_all_plan", query.excludes) if query.match(x))
 
     findAll = find_all
     __call__ = find_all
 
+    def _iter_find_all_candidates(self):
+        """
+        Yield this node and every node under it in the order in which
+        .find_all() tests them.
+        """
+        return _walk_tree(self, "_find_all_plan")
+
     def parent_find(self, identifier, *args, **kwargs):
+        query = identifier if isinstance(identifier, Query) else Query(identifier, *args, **kwargs)
+
         current = self
         while current.parent and current.on_attribute != 'root':
-            if self._node_match_query(current.parent, identifier, *args, **kwargs):
+            if query.match(current.parent):
                 return current.parent
 
             current = current.parent
         return None
 
     def _node_match_query(self, node, identifier, *args, **kwargs):
-        if not self._attribute_match_query(node._generate_identifiers(), identifier.lower() if isinstance(identifier, string_instance) and not identifier.startswith("re:") else identifier):
-            return False
-
-        all_my_keys = node._str_keys + node._list_keys + node._dict_keys
-
-        if args and isinstance(args[0], (string_instance, re._pattern_type, list, tuple)):
-            if not self._attribute_match_query([getattr(node, node._default_test_value)], args[0]):
-                return False
-            args = args[1:]
-
-        for arg in args:
-            if not arg(node):
-                return False
+        if not isinstance(identifier, Query):
+            identifier = Query(identifier, *args, **kwargs)
 
-        for key, value in kwargs.items():
-            if key not in all_my_keys:
-                return False
-
-            if not self._attribute_match_query([getattr(node, key)], value):
-                return False
-
-        return True
+        return identifier.match(node)
 
     def _attribute_match_query(self, attribute_names, query):
         """
@@ -750,30 +1672,7 @@ class Node(GenericNodesUtils):
         """
         assert isinstance(attribute_names, (list, tuple))
 
-        if isinstance(query, string_instance) and query.startswith("re:"):
-            query = re.compile(query[3:])
-
-        for attribute in attribute_names:
-            if callable(query):
-                if query(attribute):
-                    return True
-
-            elif isinstance(query, string_instance) and query.startswith("g:"):
-                if fnmatch(attribute, query[2:]):
-                    return True
-
-            elif isinstance(query, re._pattern_type):
-                if query.match(attribute):
-                    return True
-
-            elif isinstance(query, (list, tuple)):
-                if attribute in query:
-                    return True
-            else:
-                if attribute == query:
-                    return True
-
-        return False
+        return any(map(_compile_attribute_query(query), attribute_names))
 
 
     def find_by_path(self, path):
@@ -783,21 +1682,58 @@ class Node(GenericNodesUtils):
     def path(self):
         return Path(self)
 
+    def _get_identifiers(self):
+        """
+        Return the identifiers of this node as a frozenset, as a sorted tuple
+        and as a mask, computed once per class (and type, which is nearly
+        always the one of the class).
+        """
+        key = (self.__class__, self.type)
+        identifiers = _node_identifiers.get(key)
+
+        if identifiers is None:
+            identifiers = set(map(lambda x: x.lower(), [
+                self.type,
+                self.__class__.__name__,
+                self.__class__.__name__.replace("Node", ""),
+                self.type + "_"
+            ] + self._other_identifiers))
+            identifiers = _node_identifiers[key] = (frozenset(identifiers), tuple(sorted(identifiers)), _get_identifiers_mask(identifiers))
+
+        return identifiers
+
+    def _get_subtree_mask(self):
+        """
+        Return the mask (see _identifier_bits) of the identifiers of this node
+        and of all the nodes .find_all() goes through under it, so queries can
+        skip the parts of the tree where they can't match. It is computed on
+        first use and dropped when the structure under the node changes.
+        """
+        if self._subtree_mask is None:
+            # the nodes whose mask isn't known yet, deepest last, so going
+            # through them backwards the masks under a node are always known
+            nodes = list(_walk_tree(self, "_find_all_plan", lambda x: x._subtree_mask is not None, empty_keys=True))
+
+            for node in reversed(nodes):
+                mask = node._get_identifiers()[2]
+                for child in _get_children(node, "_find_all_plan", empty_keys=True):
+                    mask |= child._subtree_mask
+                object.__setattr__(node, "_subtree_mask", mask)
+
+        return self._subtree_mask
+
     def _generate_identifiers(self):
-        return sorted(set(map(lambda x: x.lower(), [
-            self.type,
-            self.__class__.__name__,
-            self.__class__.__name__.replace("Node", ""),
-            self.type + "_"
-        ] + self._other_identifiers)))
+        return self._get_identifiers()[1]
 
     def _get_helpers(self):
         not_helpers = set([
             'copy',
+            'dump',
             'dumps',
             'find',
             'findAll',
             'find_all',
+            'iter_find_all',
             'fst',
             'help',
             'next_generator',
@@ -814,6 +1750,7 @@ class Node(GenericNodesUtils):
             'has_render_key',
             'get_absolute_bounding_box_of_attribute',
             'find_by_position',
+            'find_by_positions',
             'parse_code_block',
             'parse_decorators',
             'from_fst',
@@ -826,23 +1763,109 @@ class Node(GenericNodesUtils):
 
     def fst(self):
         to_return = {}
-        for key in self._str_keys:
-            to_return[key] = getattr(self, key)
-        for key in self._list_keys:
-            # Proxy Lists overload __iter__ for a better user interface
-            if isinstance(getattr(self, key), ProxyList):
-                to_return[key] = [node.fst() for node in getattr(self, key).node_list]
-            else:
-                to_return[key] = [node.fst() for node in getattr(self, key)]
-        for key in self._dict_keys:
-            if getattr(self, key) not in (None, "", [], {}):
-                to_return[key] = getattr(self, key).fst()
-            else:
-                to_return[key] = {}
+        # the nodes whose fst is left to fill in, with the dict to fill in,
+        # instead of recursing
+        stack = [(self, to_return)]
+        while stack:
+            node, fst = stack.pop()
+            if node is not self and _overrides(node.__class__, "fst"):
+                fst.update(node.fst())
+                continue
+
+            for key in node._str_keys:
+                fst[key] = getattr(node, key)
+            for key in node._list_keys:
+                target = getattr(node, key)
+                # Proxy Lists overload __iter__ for a better user interface
+                if isinstance(target, ProxyList):
+                    target = target.node_list
+                if isinstance(target, NodeList):
+                    target = target.data
+                fst[key] = [{} for _ in target]
+                stack.extend(zip(target, fst[key]))
+            for key in node._dict_keys:
+                target = getattr(node, key)
+                fst[key] = {}
+                if target not in (None, "", [], {}):
+                    stack.append((target, fst[key]))
+
         return to_return
 
     def dumps(self):
-        return baron.dumps(self.fst())
+        to_return = []
+        self._dump_to(to_return.append)
+        return "".join(to_return)
+
+    def dump(self, fp):
+        """
+        Write the source code of the node to the file object 'fp' as it is
+        rendered, without building it as a whole string first.
+        """
+        self._dump_to(fp.write)
+
+    def _dump_to(self, write):
+        """
+        Give the source code of this node to 'write', rendered straight from
+        the node instead of going through .fst() and baron.dumps().
+
+        The source code is kept on the node until it, or anything under it,
+        is modified (see _on_modification), so rendering the tree again after
+        an edit only renders the nodes on the path from the edit to the root.
+        """
+        if self._rendered is None:
+            _run_nested(self._render_steps())
+
+        write(self._rendered)
+
+    def _render_steps(self):
+        """
+        Render this node into _rendered, yielding the steps rendering the
+        nodes under it first (see _run_nested).
+        """
+        to_return = []
+        append = to_return.append
+        for kind, key, dependents in self._dumps_plan:
+            if dependents and not all(self._is_set(x) for x in dependents):
+                continue
+
+            if kind == "constant":
+                append(key)
+            elif kind == "string":
+                append(getattr(self, key))
+            elif kind == "key":
+                target = getattr(self, key)
+                if target not in (None, "", [], {}):
+                    if target._rendered is None and not _overrides(target.__class__, "_dump_to"):
+                        yield target._render_steps()
+                    target._dump_to(append)
+            else:
+                target = getattr(self, key)
+                if isinstance(target, ProxyList):
+                    target = target.node_list
+                if isinstance(target, NodeList):
+                    target = target.data
+                for node in target:
+                    if node._rendered is None and not _overrides(node.__class__, "_dump_to"):
+                        yield node._render_steps()
+                    node._dump_to(append)
+
+        object.__setattr__(self, "_rendered", "".join(to_return))
+
+    def _is_set(self, key):
+        """
+        Tell if 'key' is set the same way baron does it on the output of .fst()
+        to decide if the items depending on it are rendered.
+        """
+        target = getattr(self, key)
+        if key in self._str_keys:
+            return bool(target)
+
+        if isinstance(target, Node):
+            return True
+
+        if isinstance(target, ProxyList):
+            target = target.node_list
+        return target not in (None, "", [], {}) and len(target) != 0
 
     def help(self, deep=2, with_formatting=False):
         if runned_from_ipython():
@@ -909,17 +1932,97 @@ class Node(GenericNodesUtils):
                          HtmlFormatter(noclasses=True, encoding="UTf-8"))
 
     def copy(self):
-        # XXX not very optimised but at least very simple
-        return Node.from_fst(self.fst())
+        return self._copy(parent=None, on_attribute=None)
+
+    def _copy(self, parent, on_attribute):
+        """
+        Deep copy of this node built straight from its attributes, the same
+        way __init__ would build it from the output of .fst(), but without
+        that round trip.
+        """
+        new = self.__class__.__new__(self.__class__)
+        _run_nested(self._copy_steps(new, parent, on_attribute))
+        return new
+
+    def _copy_steps(self, new, parent, on_attribute):
+        """
+        The body of _copy, as a generator filling 'new', a bare instance of
+        the class of this node, and yielding the steps copying the nodes under
+        it (see _run_nested).
+        """
+        klass = self.__class__
+        object.__setattr__(new, "init", True)
+        # the raw fst of the children not accessed yet can be shared, it's
+        # never modified, only converted into nodes
+        pending_fst = self._pending_fst
+        object.__setattr__(new, "_pending_fst", dict(pending_fst) if pending_fst is not None else None)
+        object.__setattr__(new, "_position", None)
+        object.__setattr__(new, "_rendered", self._rendered)
+        object.__setattr__(new, "_subtree_mask", self._subtree_mask)
+        object.__setattr__(new, "parent", parent)
+        object.__setattr__(new, "on_attribute", on_attribute)
+        object.__setattr__(new, "type", self.type)
+
+        if self.type != self._node_type:
+            for name, value in _get_node_plans(self.type).items():
+                setattr(new, name, value)
+
+        # the strings have already been checked by the setter of this node
+        # and most nodes, the separators of the proxy lists included, don't
+        # wrap their children into a proxy list, so their setter is skipped
+        set_key = object.__setattr__ if klass.__setattr__ is Node.__setattr__ else setattr
+
+        for kind, key in self._init_plan:
+            if pending_fst and key in pending_fst:
+                continue
+
+            target = getattr(self, key)
+            if kind == "key":
+                if target not in (None, "", [], {}):
+                    child = target.__class__.__new__(target.__class__)
+                    yield target._copy_steps(child, new, key)
+                    set_key(new, key, child)
+                else:
+                    set_key(new, key, None)
+
+            elif kind in ("bool", "string"):
+                object.__setattr__(new, key, target)
+
+            else:
+                if isinstance(target, ProxyList):
+                    target = target.node_list
+                if isinstance(target, NodeList):
+                    target = target.data
+                children = []
+                for node in target:
+                    child = node.__class__.__new__(node.__class__)
+                    yield node._copy_steps(child, new, key)
+                    children.append(child)
+                set_key(new, key, NodeList(children, parent=new, on_attribute=key))
+
+        object.__setattr__(new, "init", False)
 
     def __setattr__(self, name, value):
+        pending_fst = self._pending_fst
+        if pending_fst and name in pending_fst:
+            # the raw fst is overwritten before having been accessed
+            del pending_fst[name]
+
         if name == "init" or self.init:
             return super(Node, self).__setattr__(name, value)
 
         # FIXME I'm pretty sure that Bool should also be put in the isinstance for cases like with_parenthesis/as
         # also, the int stuff won't scale to all number notations
-        if name in self._str_keys and not isinstance(value, (string_instance, int)):
-            value = str(value)
+        structural = True
+
+        if name in self._str_keys:
+            if not isinstance(value, (string_instance, int)):
+                value = str(value)
+
+            # a string replacing another one doesn't change the rendering
+            # order, only strings are rendered as part of their node
+            if name != "type" and isinstance(value, string_instance):
+                structural = not isinstance(getattr(self, name), string_instance)
 
         elif name in self._dict_keys:
             value = self._convert_input_to_node_object(value, self, name)
@@ -927,7 +2030,11 @@ class Node(GenericNodesUtils):
         elif name in self._list_keys:
             value = self._convert_input_to_node_object_list(value, self, name)
 
-        return super(Node, self).__setattr__(name, value)
+        else:
+            return super(Node, self).__setattr__(name, value)
+
+        super(Node, self).__setattr__(name, value)
+        self._on_modification(structural)
 
 
     def _render(self):
@@ -935,8 +2042,11 @@ class Node(GenericNodesUtils):
 
     def replace(self, new_node):
         new_node = self._convert_input_to_node_object(new_node, parent=None, on_attribute=None, generic=True)
+        for key in _get_node_plans(self.type):
+            self.__dict__.pop(key, None)
         self.__class__ = new_node.__class__  # YOLO
         self.__init__(new_node.fst(), parent=self.parent, on_attribute=self.on_attribute)
+        self._on_modification()
 
     def edit(self, editor=None):
         if editor is None:
@@ -965,23 +2075,30 @@ class Node(GenericNodesUtils):
         if not self.parent:
             return None
 
-        if not isinstance(getattr(self.parent, self.on_attribute), (NodeList, ProxyList)):
+        in_list = getattr(self.parent, self.on_attribute)
+
+        if isinstance(in_list, ProxyList):
+            return in_list.index(self)
+
+        if not isinstance(in_list, NodeList):
             return None
 
-        return getattr(self.parent, self.on_attribute).index(self)
+        return self._get_position_in(in_list)
 
     @property
     def index_on_parent_raw(self):
         if not self.parent:
             return None
 
-        if not isinstance(getattr(self.parent, self.on_attribute), (NodeList, ProxyList)):
+        in_list = getattr(self.parent, self.on_attribute)
+
+        if isinstance(in_list, ProxyList):
+            in_list = in_list.node_list
+
+        if not isinstance(in_list, NodeList):
             return None
 
-        if isinstance(getattr(self.parent, self.on_attribute), ProxyList):
-            return getattr(self.parent, self.on_attribute).node_list.index(self)
-        else:
-            return getattr(self.parent, self.on_attribute).index(self)
+        return self._get_position_in(in_list)
 
     def _generate_nodes_in_rendering_order(self):
         previous = None
@@ -1001,7 +2118,7 @@ class Node(GenericNodesUtils):
         if not self.has_render_key(attribute):
             raise KeyError()
         path = self.path().to_baron_path() + [attribute]
-        return baron.path.path_to_bounding_box(self.root.fst(), path)
+        return self.root._get_absolute_bounding_box(path)
 
     def increase_indentation(self, number_of_spaces):
         self.get_indentation_node().indent += number_of_spaces * " "
@@ -1174,6 +2291,12 @@ class ElseAttributeNode(CodeBlockNode):
 
 
 class ProxyList(object):
+    # see batch()
+    _batch_depth = 0
+    _batched_diffs = ()
+    # see _append_items()
+    _synchronised = None
+
     def __init__(self, node_list, on_attribute="value"):
         self.node_list = node_list
         self.data = list(node_list.filtered())
@@ -1192,51 +2315,214 @@ class ProxyList(object):
         else:
             return NodeList([self._convert_input_to_node_object(x, parent, on_attribute) for x in value])
 
-    def _generate_expected_list(self):
+    def _generate_expected_list(self, start=0):
+        # the separators of the expected list are the same node, it is only
+        # copied when it has to be inserted into node_list, see _to_insert
         expected_list = []
-        for i in self.data:
+        for i in self.data[max(start - 1, 0):]:
             expected_list.append(i)
-            separator = self.middle_separator.copy()
-            separator.parent = self.node_list
-            separator.on_attribute = self.on_attribute
-            expected_list.append(separator)
+            expected_list.append(self.middle_separator)
 
         if expected_list:
             expected_list.pop()  # don't do that if trailing is desired
 
-        return expected_list
+        return self._expected_list_after(expected_list, start)
 
-    def _diff_augmented_list(self):
-        expected_list = self._generate_expected_list()
+    def _expected_list_after(self, expected_list, start):
+        """
+        Return the part of 'expected_list' that follows the item start - 1 of
+        the proxy list, 'expected_list' having been generated from this item
+        on. Return None if the generation has dropped this item.
+        """
+        if not start:
+            return expected_list
+
+        if not expected_list or expected_list[0] is not self.data[start - 1]:
+            return None
+
+        return expected_list[1:]
+
+    def _generate_expected_tail(self, start):
+        """
+        Return the part of the expected list that follows the item start - 1
+        of the proxy list and the index of the node following this item in
+        node_list. If 'start' is 0 or this part can't be generated on its own,
+        return the whole expected list and 0.
+        """
+        if start:
+            expected_list = self._generate_expected_list(start)
+            last = self.data[start - 1]
+            node_list = self.node_list.data
+
+            if expected_list is not None:
+                for index in range(len(node_list) - 1, -1, -1):
+                    if node_list[index] is last:
+                        return expected_list, index + 1
+
+        return self._generate_expected_list(), 0
+
+    def _to_insert(self, expected, data_ids):
+        """
+        Return the node to insert into node_list for the item 'expected' of
+        the expected list: the node itself if it's one of the items of the
+        proxy list (whose ids are 'data_ids'), a copy of it if it's a separator.
+        """
+        if id(expected) in data_ids:
+            return expected
+
+        return expected._copy(self.node_list, self.on_attribute)
+
+    def _update_node_list(self, new_node_list, offset=0):
+        """
+        Replace the content of node_list, from its node 'offset' on, by
+        'new_node_list' in one go, only touching the part between the first
+        and the last node that differ.
+        """
+        old_node_list = self.node_list.data
+
+        start, end = offset, min(len(old_node_list), offset + len(new_node_list))
+        while start < end and old_node_list[start] is new_node_list[start - offset]:
+            start += 1
+
+        old_end, new_end = len(old_node_list), offset + len(new_node_list)
+        if start == old_end == new_end:
+            return
+
+        while old_end > start and new_end > start and old_node_list[old_end - 1] is new_node_list[new_end - 1 - offset]:
+            old_end -= 1
+            new_end -= 1
+
+        old_node_list[start:old_end] = new_node_list[start - offset:new_end - offset]
+        self.node_list._update_positions(start)
+        self.node_list._on_modification()
+
+    def _diff_augmented_list(self, start=0):
+        """
+        Insert into node_list the items of the expected list that are missing
+        from it, in a single pass over both lists.
+
+        If 'start' is given, node_list is up to date for the first 'start'
+        items of the proxy list and the others have been appended since: only
+        the part of node_list that follows these items is merged.
+
+        Return whether node_list now matches the expected list node for node.
+        """
+        expected_list, offset = self._generate_expected_tail(start)
+        data_ids = set(map(id, self.data[start if offset else 0:]))
+        separator_type = self.middle_separator.type
 
-        for i in range(len(expected_list)):
-            if i >= len(self.node_list):
-                self.node_list.insert(i + 1, expected_list[i])
+        node_list = self.node_list.data
+        new_node_list = []
+        j = offset
+
+        for expected in expected_list:
+            if j >= len(node_list):
+                new_node_list.append(self._to_insert(expected, data_ids))
+
+            elif node_list[j] is not expected and\
+                    not (node_list[j].type == expected.type and\
+                         node_list[j].type == separator_type):
+                new_node_list.append(self._to_insert(expected, data_ids))
+
+            else:
+                new_node_list.append(node_list[j])
+                j += 1
 
-            elif self.node_list[i] is not expected_list[i] and\
-                    not (self.node_list[i].type == expected_list[i].type and\
-                         self.node_list[i].type == self.middle_separator.type):
-                self.node_list.insert(i, expected_list[i])
+        aligned = j == len(node_list)
+        new_node_list.extend(node_list[j:])
+        self._update_node_list(new_node_list, offset)
+        return aligned
 
     def _diff_reduced_list(self):
+        """
+        Remove from node_list the nodes that aren't in the expected list
+        anymore, in a single pass over both lists.
+
+        Return whether node_list now matches the expected list node for node.
+        """
         expected_list = self._generate_expected_list()
+        separator_type = self.middle_separator.type
 
-        i = 0
+        new_node_list = []
+
+        for node in self.node_list.data:
+            i = len(new_node_list)
 
-        while i < len(self.node_list):
             if i >= len(expected_list):
-                self.node_list.pop(i)
+                continue
 
             # type is equal, check for formatting nodes
-            elif self.node_list[i].type == expected_list[i].type and self.node_list[i].type == self.middle_separator.type:
-                i += 1
+            elif node.type == expected_list[i].type and node.type == separator_type:
+                new_node_list.append(node)
 
             # that's the same node, continue
-            elif self.node_list[i] is expected_list[i]:
-                i += 1
+            elif node is expected_list[i]:
+                new_node_list.append(node)
 
-            else:
-                self.node_list.pop(i)
+        self._update_node_list(new_node_list)
+        return len(new_node_list) == len(expected_list)
+
+    def _synchronise(self, reduced=False, augmented=False, appended_from=0):
+        """
+        Update node_list after the items of the proxy list have been modified,
+        or only remember which diffs it needs when inside batch().
+
+        'appended_from' is the previous length of the proxy list when node_list
+        was up to date and items have only been appended since.
+        """
+        if self._batch_depth:
+            self._batched_diffs = (self._batched_diffs[0] or reduced, self._batched_diffs[1] or augmented)
+            return
+
+        aligned = False
+        if reduced:
+            aligned = self._diff_reduced_list()
+        if augmented:
+            aligned = self._diff_augmented_list(appended_from)
+        self._on_modification()
+        self._synchronised = self._synchronisation_key() if aligned else None
+
+    def _synchronisation_key(self):
+        """
+        Identify the state of the trees and of this proxy list for which
+        node_list has been updated.
+        """
+        return (GenericNodesUtils._modifications, len(self.data), id(self.middle_separator))
+
+    def _append_items(self, items):
+        """
+        Append the node objects 'items' to the proxy list. If nothing has been
+        modified since the last diff left node_list matching the expected list,
+        only the end of node_list is merged.
+        """
+        if self._synchronised == self._synchronisation_key():
+            appended_from = len(self.data)
+        else:
+            appended_from = 0
+
+        self.data.extend(items)
+        self._synchronise(augmented=True, appended_from=appended_from)
+
+    @contextlib.contextmanager
+    def batch(self):
+        """
+        Context manager in which the modifications of the proxy list only
+        change its items: node_list, and thus the rendering of the tree, is
+        only updated once on exit.
+        """
+        if not self._batch_depth:
+            self._batched_diffs = (False, False)
+
+        self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+
+            if not self._batch_depth:
+                reduced, augmented = self._batched_diffs
+                if reduced or augmented:
+                    self._synchronise(reduced=reduced, augmented=augmented)
 
     def __len__(self):
         return len(self.data)
@@ -1244,21 +2530,20 @@ class ProxyList(object):
     def insert(self, index, value):
         value = self._convert_input_to_node_object(value, parent=self.node_list, on_attribute=self.on_attribute)
         self.data.insert(index, value)
-        self._diff_augmented_list()
+        self._synchronise(augmented=True)
 
     def append(self, value):
-        self.insert(len(self), value)
+        self._append_items([self._convert_input_to_node_object(value, parent=self.node_list, on_attribute=self.on_attribute)])
 
     def extend(self, values):
-        self.data.extend(self._convert_input_to_node_object_list(values, parent=self.node_list, on_attribute=self.on_attribute))
-        self._diff_augmented_list()
+        self._append_items(self._convert_input_to_node_object_list(values, parent=self.node_list, on_attribute=self.on_attribute))
 
     def pop(self, index=None):
         if index is not None:
             self.data.pop(index)
         else:
             self.data.pop()
-        self._diff_reduced_list()
+        self._synchronise(reduced=True)
 
     def remove(self, value):
         self.pop(self.index(value))
@@ -1292,17 +2577,15 @@ class ProxyList(object):
             self.__setslice__(key.start, key.stop, value)
         else:
             self.data.__setitem__(key, self._convert_input_to_node_object(value, parent=self.node_list, on_attribute=self.on_attribute))
-        self._diff_reduced_list()
-        self._diff_augmented_list()
+        self._synchronise(reduced=True, augmented=True)
 
     def __setslice__(self, i, j, value):
         self.data[i:j] = self._convert_input_to_node_object_list(value, parent=self.node_list, on_attribute=self.on_attribute)
-        self._diff_reduced_list()
-        self._diff_augmented_list()
+        self._synchronise(reduced=True, augmented=True)
 
     def __delslice__(self, i, j):
         del self.data[i:j]
-        self._diff_reduced_list()
+        self._synchronise(reduced=True)
 
     def __getslice__(self, i, j):
         to_return = self.data[i:j]
@@ -1354,6 +2637,9 @@ class CommaProxyList(ProxyList):
     def __init__(self, node_list, on_attribute="value"):
         super(CommaProxyList, self).__init__(node_list, on_attribute=on_attribute)
         self.style = "indented" if any(self.node_list('comma', recursive=False).map(lambda x: x('endl'))) else "flat"
+        # (number of modifications, {id: (comma, formatting)}): the commas
+        # known to have the given formatting, see _update_separator_formatting
+        self._formatted_separators = (None, {})
 
     def _get_middle_separator(self):
         if self.style == "indented":
@@ -1361,7 +2647,7 @@ class CommaProxyList(ProxyList):
 
         return CommaNode({"type": "comma", "first_formatting": [], "second_formatting": [{"type": "space", "value": " "}]})
 
-    def _generate_expected_list(self):
+    def _generate_expected_list(self, start=0):
         if self.style == "indented":
             if self.data:
                 self.parent.second_formatting = NodeList.from_fst([{"type": "endl", "indent": self.parent.indentation + "    ", "formatting": [], "value": "\n"}])
@@ -1369,58 +2655,119 @@ class CommaProxyList(ProxyList):
                 self.parent.second_formatting = NodeList.from_fst([])
 
         expected_list = []
+        separator = self._get_middle_separator()
 
-        for i in self.data:
+        for i in self.data[max(start - 1, 0):]:
             expected_list.append(i)
-            separator = self._get_middle_separator().copy()
-            separator.parent = self.node_list
-            separator.on_attribute = self.on_attribute
             expected_list.append(separator)
 
         if self.style == "flat" and expected_list:
             expected_list.pop()  # don't do that if trailing is desired
         elif self.style == "indented" and expected_list:
+            expected_list[-1] = self._get_middle_separator()
             expected_list[-1].second_formatting[0].indent = self.parent.indentation
 
-        return expected_list
+        return self._expected_list_after(expected_list, start)
 
-    def _diff_augmented_list(self):
-        expected_list = self._generate_expected_list()
+    def _synchronisation_key(self):
+        return super(CommaProxyList, self)._synchronisation_key() + (self.style,)
+
+    def _get_formatted_separators(self):
+        """
+        Return the commas whose formatting has been set or checked by the last
+        modification of this proxy list, if nothing has been modified since.
+        """
+        modifications, formatted_separators = self._formatted_separators
+        if modifications != GenericNodesUtils._modifications:
+            return {}
+        return formatted_separators
+
+    def _set_formatted_separators(self, formatted_separators):
+        # _synchronise(), that has called the diff, calls _on_modification()
+        # right after it
+        self._formatted_separators = (GenericNodesUtils._modifications + 1, formatted_separators)
 
-        for i in range(len(expected_list)):
-            if i >= len(self.node_list):
-                self.node_list.insert(i + 1, expected_list[i])
+    def _update_separator_formatting(self, node, expected, formattings, formatted_separators, new_formatted_separators):
+        """
+        Give to the comma 'node' the formatting of the separator 'expected',
+        unless it already has the same one. 'formattings' caches the fst of
+        the formatting of the expected separators.
+
+        This is skipped for the commas whose formatting has already been
+        checked against the same one and which haven't been modified since.
+        """
+        formatting = formattings.get(id(expected))
+        if formatting is None:
+            formatting = formattings[id(expected)] = repr(expected.second_formatting.fst())
+
+        known = formatted_separators.get(id(node))
+        if known is None or known[0] is not node or known[1] != formatting:
+            if repr(node.second_formatting.fst()) != formatting:
+                node.second_formatting = expected.second_formatting.copy()
+
+        new_formatted_separators[id(node)] = (node, formatting)
+
+    def _diff_augmented_list(self, start=0):
+        formatted_separators = self._get_formatted_separators()
+        expected_list, offset = self._generate_expected_tail(start)
+        data_ids = set(map(id, self.data[start if offset else 0:]))
+        separator_type = self.middle_separator.type
+        formattings = {}
+        # the commas before the merged part are left untouched
+        new_formatted_separators = formatted_separators if offset else {}
+
+        node_list = self.node_list.data
+        new_node_list = []
+        j = offset
+
+        for expected in expected_list:
+            if j >= len(node_list):
+                new_node_list.append(self._to_insert(expected, data_ids))
+                continue
 
-            elif self.node_list[i] is not expected_list[i] and\
-                    not (self.node_list[i].type == expected_list[i].type and\
-                         self.node_list[i].type == self.middle_separator.type):
-                self.node_list.insert(i, expected_list[i])
+            node = node_list[j]
+            if node is not expected and not (node.type == expected.type and node.type == separator_type):
+                new_node_list.append(self._to_insert(expected, data_ids))
+
+            else:
+                if node.type == "comma" and expected.type == "comma":
+                    self._update_separator_formatting(node, expected, formattings, formatted_separators, new_formatted_separators)
+
+                new_node_list.append(node)
+                j += 1
 
-            elif (self.node_list[i].type, expected_list[i].type) == ("comma", "comma"):
-                if self.node_list[i].second_formatting != expected_list[i].second_formatting:
-                    self.node_list[i].second_formatting = expected_list[i].second_formatting.copy()
+        aligned = j == len(node_list)
+        new_node_list.extend(node_list[j:])
+        self._update_node_list(new_node_list, offset)
+        self._set_formatted_separators(new_formatted_separators)
+        return aligned
 
     def _diff_reduced_list(self):
+        formatted_separators, new_formatted_separators = self._get_formatted_separators(), {}
         expected_list = self._generate_expected_list()
+        separator_type = self.middle_separator.type
+        formattings = {}
 
-        i = 0
+        new_node_list = []
+
+        for node in self.node_list.data:
+            i = len(new_node_list)
 
-        while i < len(self.node_list):
             if i >= len(expected_list):
-                self.node_list.pop(i)
+                continue
 
             # type is equal, check for formatting nodes
-            elif self.node_list[i].type == expected_list[i].type and self.node_list[i].type == self.middle_separator.type:
-                if self.node_list[i].second_formatting != expected_list[i].second_formatting:
-                    self.node_list[i].second_formatting = expected_list[i].second_formatting.copy()
-                i += 1
+            elif node.type == expected_list[i].type and node.type == separator_type:
+                self._update_separator_formatting(node, expected_list[i], formattings, formatted_separators, new_formatted_separators)
+                new_node_list.append(node)
 
             # that's the same node, continue
-            elif self.node_list[i] is expected_list[i]:
-                i += 1
+            elif node is expected_list[i]:
+                new_node_list.append(node)
 
-            else:
-                self.node_list.pop(i)
+        self._update_node_list(new_node_list)
+        self._set_formatted_separators(new_formatted_separators)
+        return len(new_node_list) == len(expected_list)
 
 
 class DotProxyList(ProxyList):
@@ -1428,68 +2775,79 @@ class DotProxyList(ProxyList):
         super(DotProxyList, self).__init__(node_list, on_attribute=on_attribute)
         self.middle_separator = DotNode({"type": "dot", "first_formatting": [], "second_formatting": []})
 
-    def _diff_augmented_list(self):
-        expected_list = self._generate_expected_list()
+    def _diff_augmented_list(self, start=0):
+        expected_list, offset = self._generate_expected_tail(start)
+        data_ids = set(map(id, self.data[start if offset else 0:]))
+        separator_type = self.middle_separator.type
 
-        i, j = 0, 0
+        node_list = self.node_list.data
+        j = offset
 
-        while j < len(self.node_list) and self.node_list[j].type == "dot":
+        while not offset and j < len(node_list) and node_list[j].type == "dot":
             j += 1
 
-        while i < len(expected_list):
-            if j >= len(self.node_list):
-                self.node_list.insert(j + 1, expected_list[i])
+        new_node_list = node_list[offset:j]
 
-            elif self.node_list[j] is not expected_list[i] and\
-                    not (self.node_list[j].type == expected_list[i].type and\
-                         self.node_list[j].type == self.middle_separator.type):
-                self.node_list.insert(j, expected_list[i])
+        for expected in expected_list:
+            if j >= len(node_list):
+                new_node_list.append(self._to_insert(expected, data_ids))
 
-            i += 1
-            j += 1
+            elif node_list[j] is not expected and\
+                    not (node_list[j].type == expected.type and\
+                         node_list[j].type == separator_type):
+                new_node_list.append(self._to_insert(expected, data_ids))
+
+            else:
+                new_node_list.append(node_list[j])
+                j += 1
+
+        aligned = j == len(node_list)
+        new_node_list.extend(node_list[j:])
+        self._update_node_list(new_node_list, offset)
+        return aligned
 
     def _diff_reduced_list(self):
         expected_list = self._generate_expected_list()
+        separator_type = self.middle_separator.type
 
+        node_list = self.node_list.data
+        j = 0
 
-        i, j = 0, 0
-
-        while j < len(self.node_list) and self.node_list[j].type == "dot":
+        while j < len(node_list) and node_list[j].type == "dot":
             j += 1
 
-        while j < len(self.node_list):
+        new_node_list = node_list[:j]
+
+        for node in node_list[j:]:
+            i = len(new_node_list) - j
+
             if i >= len(expected_list):
-                self.node_list.pop(j)
+                continue
 
             # type is equal, check for formatting nodes
-            elif self.node_list[j].type == expected_list[i].type and self.node_list[j].type == self.middle_separator.type:
-                i += 1
-                j += 1
+            elif node.type == expected_list[i].type and node.type == separator_type:
+                new_node_list.append(node)
 
             # that's the same node, continue
-            elif self.node_list[j] is expected_list[i]:
-                i += 1
-                j += 1
+            elif node is expected_list[i]:
+                new_node_list.append(node)
 
-            else:
-                self.node_list.pop(j)
+        self._update_node_list(new_node_list)
+        return len(new_node_list) - j == len(expected_list)
 
-    def _generate_expected_list(self):
+    def _generate_expected_list(self, start=0):
         expected_list = []
-        for i in self.data:
+        for i in self.data[max(start - 1, 0):]:
             if expected_list and i.type in ("call", "getitem"):
                 expected_list.pop()
 
             expected_list.append(i)
-            separator = self.middle_separator.copy()
-            separator.parent = self.node_list
-            separator.on_attribute = self.on_attribute
-            expected_list.append(separator)
+            expected_list.append(self.middle_separator)
 
         if expected_list:
             expected_list.pop()  # don't do that if trailing is desired
 
-        return expected_list
+        return self._expected_list_after(expected_list, start)
 
     def _convert_input_to_node_object(self, value, parent, on_attribute):
         if value.startswith(("(", "[")):
@@ -1503,7 +2861,7 @@ class DotProxyList(ProxyList):
 class LineProxyList(ProxyList):
     def __init__(self, node_list, on_attribute="value"):
         super(LineProxyList, self).__init__(node_list, on_attribute=on_attribute)
-        self.middle_separator = DotNode({"type": "endl", "formatting": [], "value": "\n", "indent": "    "})
+        self.middle_separator = EndlNode({"type": "endl", "formatting": [], "value": "\n", "indent": "    "})
 
         self.data = []
         previous = None
@@ -1515,117 +2873,142 @@ class LineProxyList(ProxyList):
 
             previous = i
 
-    def _generate_expected_list(self):
-        def generate_separator():
-            separator = self.middle_separator.copy()
-            separator.parent = self.node_list
-            separator.on_attribute = self.on_attribute
-            separator.indent = indentation
-            return separator
+    def _generate_separator(self, indentation):
+        separator = self.middle_separator.copy()
+        separator.indent = indentation
+        return separator
 
-        indentation = self.node_list.filtered()[0].indentation if self.node_list.filtered() else self.parent.indentation + "    "
+    def _generate_expected_list(self, start=0):
+        first = self.node_list._first_filtered()
+        indentation = first.indentation if first is not None else self.parent.indentation + "    "
+        separator = self._generate_separator(indentation)
         expected_list = []
 
-        expected_list.append(generate_separator())
+        if not start:
+            expected_list.append(separator)
 
-        for i in self.data:
+        for position, i in enumerate(self.data[max(start - 1, 0):], max(start - 1, 0)):
             # we face a blank line, remove previous separator since a blank line is not
-            # previoused by a separator
-            if i.type == "endl":
+            # previoused by a separator (the item start - 1 has none before it here)
+            if i.type == "endl" and position >= start:
                 expected_list.pop()
 
             expected_list.append(i)
             if i.type not in ('function', 'class'):
-                expected_list.append(generate_separator())
+                expected_list.append(separator)
 
         if expected_list:
             if self.parent and self.parent.next:
-                expected_list[-1].indent = self.parent.indentation
+                indentation = self.parent.indentation
             else:
-                expected_list[-1].indent = ""
+                indentation = ""
 
-        return expected_list
+            if expected_list[-1] is separator:
+                expected_list[-1] = self._generate_separator(indentation)
+            else:
+                expected_list[-1].indent = indentation
 
-    def _diff_augmented_list(self):
-        def is_blank_line(node):
-            return node in self.data
+        return self._expected_list_after(expected_list, start)
 
-        expected_list = self._generate_expected_list()
+    def _diff_augmented_list(self, start=0):
+        expected_list, offset = self._generate_expected_tail(start)
+        data_ids = set(map(id, self.data[start if offset else 0:]))
+
+        def is_blank_line(node):
+            return id(node) in data_ids
+
+        node_list = self.node_list.data
+        new_node_list = []
+        j = offset
+
+        for expected in expected_list:
+            if j >= len(node_list):
+                new_node_list.append(self._to_insert(expected, data_ids))
+
+            elif (node_list[j].type, expected.type) == ("endl", "endl")\
+                    and not is_blank_line(expected)\
+                    and not is_blank_line(node_list[j]):
+                if node_list[j].indent != expected.indent:
+                    node_list[j].indent = expected.indent
+                new_node_list.append(node_list[j])
+                j += 1
 
-        for i in range(len(expected_list)):
-            if i >= len(self.node_list):
-                self.node_list.insert(i + 1, expected_list[i])
+            elif node_list[j] is not expected and\
+                    (not (node_list[j].type, expected.type) == ("endl", "endl") or is_blank_line(expected) or is_blank_line(node_list[j])):
+                new_node_list.append(self._to_insert(expected, data_ids))
 
-            elif (self.node_list[i].type, expected_list[i].type) == ("endl", "endl")\
-                    and not is_blank_line(expected_list[i])\
-                    and not is_blank_line(self.node_list[i]):
-                if self.node_list[i].indent != expected_list[i].indent:
-                    self.node_list[i].indent = expected_list[i].indent
+            else:
+                new_node_list.append(node_list[j])
+                j += 1
 
-            elif self.node_list[i] is not expected_list[i] and\
-                    (not (self.node_list[i].type, expected_list[i].type) == ("endl", "endl") or is_blank_line(expected_list[i]) or is_blank_line(self.node_list[i])):
-                self.node_list.insert(i, expected_list[i])
+        aligned = j == len(node_list)
+        new_node_list.extend(node_list[j:])
+        self._update_node_list(new_node_list, offset)
+        return aligned
 
     def _diff_reduced_list(self):
         expected_list = self._generate_expected_list()
+        separator_type = self.middle_separator.type
+        data_ids = set(map(id, self.data))
+        # a blank line can take the place of a separator here
+        aligned = True
 
-        i = 0
+        new_node_list = []
+
+        for node in self.node_list.data:
+            i = len(new_node_list)
 
-        while i < len(self.node_list):
             if i >= len(expected_list):
-                self.node_list.pop(i)
+                continue
 
             # type is equal, check for formatting nodes
-            elif self.node_list[i].type == expected_list[i].type and self.node_list[i].type == self.middle_separator.type:
-                if self.node_list[i].indent != expected_list[i].indent:
-                    self.node_list[i].indent = expected_list[i].indent
-                i += 1
+            elif node.type == expected_list[i].type and node.type == separator_type:
+                if node is not expected_list[i] and (id(node) in data_ids or id(expected_list[i]) in data_ids):
+                    aligned = False
+                if node.indent != expected_list[i].indent:
+                    node.indent = expected_list[i].indent
+                new_node_list.append(node)
 
             # that's the same node, continue
-            elif self.node_list[i] is expected_list[i]:
-                i += 1
+            elif node is expected_list[i]:
+                new_node_list.append(node)
 
-            else:
-                self.node_list.pop(i)
+        self._update_node_list(new_node_list)
+        return aligned and len(new_node_list) == len(expected_list)
 
     def get_absolute_bounding_box_of_attribute(self, index):
         if index >= len(self.data) or index < 0:
             raise IndexError()
         index = self[index].index_on_parent_raw
         path = self.path().to_baron_path() + [index]
-        return baron.path.path_to_bounding_box(self.root.fst(), path)
+        return self.root._get_absolute_bounding_box(path)
 
 
 class DecoratorsLineProxyList(LineProxyList):
     def _convert_input_to_node_object_list(self, value, parent, on_attribute):
         return map(lambda x: self._convert_input_to_node_object(x, parent, on_attribute), value)
 
-    def _generate_expected_list(self):
-        def generate_separator():
-            separator = self.middle_separator.copy()
-            separator.parent = self.node_list
-            separator.on_attribute = self.on_attribute
-            separator.indent = indentation
-            return separator
-
-        indentation = self.node_list.filtered()[0].indentation if self.node_list.filtered() else self.parent.indentation
+    def _generate_expected_list(self, start=0):
+        first = self.node_list._first_filtered()
+        indentation = first.indentation if first is not None else self.parent.indentation
+        separator = self._generate_separator(indentation)
         expected_list = []
 
-        for i in self.data:
+        for position, i in enumerate(self.data[max(start - 1, 0):], max(start - 1, 0)):
             # we face a blank line, remove previous separator since a blank line is not
-            # previoused by a separator
-            if i.type == "endl":
+            # previoused by a separator (the item start - 1 has none before it here)
+            if i.type == "endl" and position >= start:
                 expected_list.pop()
 
             expected_list.append(i)
-            expected_list.append(generate_separator())
+            expected_list.append(separator)
 
         if expected_list:
             # decorators always have a next item
             # don't break its indentation
-            expected_list[-1].indent = self.parent.indentation
+            expected_list[-1] = self._generate_separator(self.parent.indentation)
 
-        return expected_list
+        return self._expected_list_after(expected_list, start)
 
 # TODO
 # LineProxyList: special syntaxe for adding blank lines ("")
@@ -2281,7 +3664,9 @@ class ImportNode(Node):
 class IntNode(Node):
     def __init__(self, node, *args, **kwargs):
         super(IntNode, self).__init__(node, *args, **kwargs)
+        self.init = True
         self.value = int(self.value)
+        self.init = False
 
     def fst(self):
         return {
@@ -2290,6 +3675,9 @@ class IntNode(Node):
             "section": "number",
         }
 
+    def _dump_to(self, write):
+        write(str(self.value))
+
 
 class LambdaNode(Node):
     def _string_to_node_list(self, string, parent, on_attribute):
@@ -2712,11 +4100,99 @@ class WithNode(CodeBlockNode):
             setattr(self, "contexts", CommaProxyList(self.contexts, on_attribute="contexts"))
 
 
+_distribution_versions = {}
+
+
+def _distribution_version(name):
+    """
+    Return the installed version of the distribution 'name', or "unknown".
+    """
+    if name not in _distribution_versions:
+        try:
+            from importlib.metadata import version
+        except ImportError:
+            try:
+                import pkg_resources
+                version = lambda name: pkg_resources.get_distribution(name).version
+            except ImportError:
+                version = None
+
+        try:
+            _distribution_versions[name] = version(name)
+        except Exception:
+            _distribution_versions[name] = "unknown"
+
+    return _distribution_versions[name]
+
+
+def _parse_cache_path(source_code, cache_dir):
+    """
+    Return the path of the file caching the fst of 'source_code' in
+    'cache_dir'. The key contains the versions of baron and redbaron so a
+    cache is never reused with another parser.
+    """
+    key = hashlib.sha1()
+    for i in (_distribution_version("baron"), _distribution_version("redbaron"), source_code):
+        key.update(i.encode("Utf-8"))
+        key.update(b"\0")
+
+    return os.path.join(cache_dir, key.hexdigest() + ".json")
+
+
+def _parse(source_code, cache_dir=None):
+    """
+    Return baron.parse(source_code). If 'cache_dir' is given, the fst is
+    loaded from there when 'source_code' has already been parsed, and stored
+    there otherwise.
+    """
+    if cache_dir is None:
+        return baron.parse(source_code)
+
+    cache_path = _parse_cache_path(source_code, cache_dir)
+
+    try:
+        with io.open(cache_path, "r", encoding="Utf-8") as cache_file:
+            return json.load(cache_file)
+    except (IOError, OSError, ValueError):
+        pass
+
+    fst = baron.parse(source_code)
+
+    if not os.path.isdir(cache_dir):
+        os.makedirs(cache_dir)
+
+    # write to a temporary file then rename it so concurrent runs never read
+    # a partially written cache file
+    fd, temporary_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as cache_file:
+            json.dump(fst, cache_file)
+        os.rename(temporary_path, cache_path)
+    except (IOError, OSError):
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+
+    return fst
+
+
 class RedBaron(GenericNodesUtils, LineProxyList):
-    def __init__(self, source_code):
+    def __init__(self, source_code, lazy=False, cache_dir=None):
+        """
+        Parse 'source_code' into a tree of nodes.
+
+        With lazy=True, the children of a node are only built from the fst
+        the first time they are accessed, which is way cheaper when only a
+        small part of a big tree is going to be used.
+
+        With cache_dir, the fst given by baron is cached on disk in this
+        directory and reused instead of parsing the same source code again.
+        """
+        self.parent = None
+        self._type_index = None
+
         if isinstance(source_code, string_instance):
-            self.node_list = NodeList.from_fst(baron.parse(source_code), parent=self, on_attribute="root")
-            self.middle_separator = DotNode({"type": "endl", "formatting": [], "value": "\n", "indent": ""})
+            self.node_list = NodeList.from_fst(_parse(source_code, cache_dir=cache_dir), parent=self, on_attribute="root", lazy=lazy)
+            self.middle_separator = EndlNode({"type": "endl", "formatting": [], "value": "\n", "indent": ""})
 
             self.data = []
             previous = None
@@ -2736,42 +4212,175 @@ class RedBaron(GenericNodesUtils, LineProxyList):
         self.on_attribute = None
         self.parent = None
 
+    @classmethod
+    def from_file(cls, path, lazy=False, cache_dir=None):
+        """
+        Parse the python file at 'path'. See RedBaron() for 'lazy' and
+        'cache_dir'.
+        """
+        with io.open(path, "r", encoding="Utf-8") as source_file:
+            return cls(source_file.read(), lazy=lazy, cache_dir=cache_dir)
+
+    def _drop_caches(self, structural=True):
+        if structural:
+            self._type_index = None
+        # the tree can be modified while the root NodeList isn't built yet
+        if "node_list" in self.__dict__:
+            self.node_list._drop_caches(structural)
+
+    def _get_type_index(self):
+        """
+        Return a dict mapping every identifier to the list of the nodes
+        having it, in the order in which .find_all() would return them.
+
+        The index is built on first use and dropped on modification.
+        """
+        if self._type_index is None:
+            type_index = {}
+            for node in self.node_list:
+                for i in node._iter_find_all_candidates():
+                    for identifier in i._generate_identifiers():
+                        type_index.setdefault(identifier, []).append(i)
+
+            self._type_index = type_index
+
+        return self._type_index
+
+    def find_all(self, identifier, *args, **kwargs):
+        return NodeList(list(self.iter_find_all(identifier, *args, **kwargs)))
+
+    def iter_find_all(self, identifier, *args, **kwargs):
+        query, recursive = _get_query(identifier, args, kwargs)
+
+        if query.identifier is None or not recursive:
+            return self.node_list.iter_find_all(query, recursive=recursive)
+
+        return (x for x in self._get_type_index().get(query.identifier, []) if query.match(x))
+
+    findAll = find_all
+    __call__ = find_all
+
     def _convert_input_to_node_object(self, value, parent, on_attribute):
         return GenericNodesUtils._convert_input_to_node_object(self, value, self, "root")
 
     def _convert_input_to_node_object_list(self, value, parent, on_attribute):
         return GenericNodesUtils._convert_input_to_node_object_list(self, value, self, "root")
 
-    def _generate_expected_list(self):
-        def generate_separator():
-            separator = self.middle_separator.copy()
-            separator.parent = self.node_list
-            separator.on_attribute = self.on_attribute
-            separator.indent = indentation
-            return separator
-
-        indentation = ""
+    def _generate_expected_list(self, start=0):
+        separator = self._generate_separator("")
         expected_list = []
 
-        for position, i in enumerate(self.data):
+        for position, i in enumerate(self.data[max(start - 1, 0):], max(start - 1, 0)):
             # we face a blank line, remove previous separator since a blank line is not
-            # previoused by a separator
-            if i.type == "endl" and position != 0:
+            # previoused by a separator (the item start - 1 has none before it here)
+            if i.type == "endl" and position != 0 and position >= start:
                 expected_list.pop()
 
             expected_list.append(i)
 
             if not (i.type == "endl" and position == 0) and (i.type not in ('function', 'class')):
-                expected_list.append(generate_separator())
+                expected_list.append(separator)
+
+        return self._expected_list_after(expected_list, start)
+
+
+ProcessedFile = collections.namedtuple("ProcessedFile", ["path", "result", "modified", "error"])
+
+
+def _process_file(arguments):
+    """
+    Parse the file at 'path', call 'transform' on its RedBaron instance and
+    write it back if it has been modified. Errors are caught and returned as
+    a formatted traceback so they can be sent back from a worker process.
+    """
+    path, transform, write, lazy, cache_dir = arguments
+
+    try:
+        with io.open(path, "r", encoding="Utf-8") as source_file:
+            source_code = source_file.read()
+
+        red = RedBaron(source_code, lazy=lazy, cache_dir=cache_dir)
+        result = transform(red)
+        new_source_code = red.dumps()
+        modified = new_source_code != source_code
+
+        if modified and write:
+            with io.open(path, "w", encoding="Utf-8") as source_file:
+                source_file.write(new_source_code)
+
+        return ProcessedFile(path, result, modified, None)
+    except Exception:
+        return ProcessedFile(path, None, False, traceback.format_exc())
+
+
+def process_files(paths, transform, workers=None, chunksize=1, write=True, lazy=False, cache_dir=None):
+    """
+    Parse every file of 'paths', call 'transform' on its RedBaron instance
+    and write back its .dumps() if it has changed (unless write=False).
+
+    The files are processed by a pool of 'workers' processes (by default one
+    per cpu) that receive them by chunks of 'chunksize' files, so
+    'transform' and what it returns must be picklable. With workers=1,
+    everything is done in the current process.
+
+    Return a list of ProcessedFile(path, result, modified, error) in the
+    order of 'paths', 'result' being the return value of 'transform' and
+    'error' the traceback of the exception raised while processing this file,
+    if any.
+    """
+    arguments = [(path, transform, write, lazy, cache_dir) for path in paths]
+
+    if workers == 1:
+        return [_process_file(x) for x in arguments]
+
+    pool = multiprocessing.Pool(workers)
+    try:
+        return list(pool.imap(_process_file, arguments, chunksize))
+    finally:
+        pool.close()
+        pool.join()
+
+
+def register_node_class(node_type, node_class):
+    """
+    Use 'node_class', a subclass of Node, for the nodes of type 'node_type'
+    built from now on, for example to add helpers to them. Return
+    'node_class'.
+    """
+    _set_node_class_keys(node_class, node_type)
+    _node_classes[node_type] = node_class
+    return node_class
+
+
+def _set_node_class_keys(node_class, node_type):
+    """
+    Make 'node_class' the class of the nodes of type 'node_type': store the
+    keys and plans of this type on the class and alias each key to one of the
+    generic slots of Node.
+    """
+    node_class._node_type = node_type
+    for name, value in _get_node_plans(node_type).items():
+        setattr(node_class, name, value)
+
+    for position, (_, key) in enumerate(node_class._init_plan):
+        # don't hide a method or a property with the same name
+        if not isinstance(getattr(node_class, key, None), (types.MemberDescriptorType, type(None))):
+            continue
+
+        setattr(node_class, key, Node.__dict__["_slot_%s" % position])
 
-        return expected_list
 
 # to avoid to have to declare EVERY node class, dynamically create the missings
 # ones using nodes_rendering_order as a reference
 for node_type in nodes_rendering_order:
-    class_name = node_type.capitalize() + "Node"
+    class_name = _node_class_name(node_type)
     if class_name not in globals():
-        globals()[class_name] = type(class_name, (Node,), {})
+        globals()[class_name] = type(class_name, (Node,), {"__slots__": ()})
+
+    register_node_class(node_type, globals()[class_name])
+
+    # previous name of the classes of the node types containing a "_"
+    globals().setdefault(node_type.capitalize() + "Node", globals()[class_name])
 
 
 ipython_behavior = True
@@ -143,3 +143,12 @@ def test_bounding_box_of_attribute_with_proxy_list():
     assert ((28, 5), (31, 17)) == RED.class_.value.get_absolute_bounding_box_of_attribute(7)
     with pytest.raises(IndexError):
         RED.class_.value.get_absolute_bounding_box_of_attribute(8)
+
+
+def test_absolute_bounding_box_after_modification():
+    red = RedBaron("a = 1\nb = 2\n")
+    assert ((2, 1), (2, 5)) == red[1].absolute_bounding_box
+    red[0].value = "12345"
+    assert ((1, 5), (1, 9)) == red[0].value.absolute_bounding_box
+    red.insert(0, "c = 3")
+    assert ((3, 1), (3, 5)) == red[2].absolute_bounding_box
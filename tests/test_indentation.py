@@ -30,3 +30,27 @@ def test_decrease_indentation():
     indented_code = "\ndef a():\n" + "\n".join(map(lambda x: x[4:], test_indent_code.split("\n")[2:-2])) + "\n\n"
     assert red.dumps() == indented_code
 
+
+
+def test_indentation_follows_indent_modification():
+    red = RedBaron(test_indent_code)
+    plop = red.find("name", "plop")
+    assert plop.indentation == "        "
+    plop.get_indentation_node().indent = "  "
+    assert plop.indentation == "  "
+    red.increase_indentation(4)
+    assert plop.indentation == "      "
+
+
+def test_indentation_cache_dropped_on_modification():
+    red = RedBaron(test_indent_code)
+    pouf = red.find("name", "pouf")
+    assert pouf.indentation == "    "
+    red.def_.value.insert(0, "if b:\n    pass\n")
+    assert pouf.indentation == "    "
+    red.def_.value.pop()
+    red.def_.value.append("zob")
+    assert red.def_.value[-1].indentation == "    "
+    red.def_.value = "a = 1"
+    assert red.find("assignment").indentation == "    "
+    assert red.find("assignment").get_indentation_node() is red.def_.value.node_list[0]
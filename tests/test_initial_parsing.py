@@ -6,7 +6,8 @@ import baron
 import re
 from redbaron import (RedBaron, NameNode, EndlNode, IntNode, AssignmentNode,
                       PassNode, NodeList, CommaNode, DotNode, CallNode,
-                      CommaProxyList)
+                      CommaProxyList, LineProxyList, Node, register_node_class,
+                      compile_query)
 
 
 def test_empty():
@@ -31,6 +32,58 @@ def test_int():
     assert red[0].value == 1
 
 
+def test_node_class_keys():
+    assert AssignmentNode._str_keys == ("type", "operator")
+    assert AssignmentNode._list_keys == ("first_formatting", "second_formatting")
+    assert AssignmentNode._dict_keys == ("target", "value")
+    assert PassNode._str_keys == ("type",)
+
+
+def test_node_class_plans():
+    assert AssignmentNode._find_plan == (("key", "target"), ("key", "value"))
+    assert AssignmentNode._find_all_plan == (("key", "target"), ("formatting", "first_formatting"), ("formatting", "second_formatting"), ("key", "value"))
+    assert ("constant", "=") in AssignmentNode._rendering_plan
+    assert ("constant", "=") not in AssignmentNode._init_plan
+
+
+def test_node_slots():
+    red = RedBaron("a = 2")
+    assert not hasattr(red[0], "__dict__") or "value" not in red[0].__dict__
+    assert AssignmentNode.value.__get__(red[0]) is red[0].value
+
+
+def test_base_node_instance():
+    node = Node({"type": "name", "value": "a"})
+    assert node._str_keys == ("type", "value")
+    assert node.value == "a"
+    assert node.dumps() == "a"
+
+
+def test_node_class_is_shared():
+    red = RedBaron("@a.b\ndef f(): pass\n@c.d\ndef g(): pass\n")
+    first, second = red.find_all("dotted_name")
+    assert first.__class__ is second.__class__
+    assert first.__class__.__name__ == "DottedNameNode"
+
+
+def test_register_node_class():
+    class MyNameNode(NameNode):
+        def shout(self):
+            return self.value.upper()
+
+    try:
+        assert register_node_class("name", MyNameNode) is MyNameNode
+        red = RedBaron("a = b")
+        assert isinstance(red[0].target, MyNameNode)
+        assert red[0].target.shout() == "A"
+        assert red[0].value.value == "b"
+        assert red.find_all("myname") == [red[0].target, red[0].value]
+    finally:
+        register_node_class("name", NameNode)
+
+    assert type(RedBaron("a")[0]) is NameNode
+
+
 def test_assign():
     red = RedBaron("a = 2")
     assert isinstance(red[0], AssignmentNode)
@@ -68,6 +121,21 @@ def test_copy():
     assert name is not name.copy()
 
 
+def test_copy_is_deep():
+    red = RedBaron("def a(b, c=1):\n    return [b, c]\n")
+    copy = red[0].copy()
+    assert copy.fst() == red[0].fst()
+    assert isinstance(copy.arguments, CommaProxyList)
+    assert isinstance(copy.value, LineProxyList)
+    assert copy.arguments[1].value is not red[0].arguments[1].value
+    assert copy.arguments[1].value.parent is copy.arguments[1]
+    assert copy.value.node_list.parent is copy
+    copy.value[0].value.value.append("d")
+    assert copy.dumps() == "def a(b, c=1):\n    return [b, c, d]\n"
+    assert red.dumps() == "def a(b, c=1):\n    return [b, c]\n"
+    assert red.def_.value.copy().fst() == red.def_.value.node_list.fst()
+
+
 def test_dumps():
     some_code = "ax + (z * 4)"
     red = RedBaron(some_code)
@@ -130,6 +198,13 @@ def test_generate_helpers():
     assert set(red[0]._generate_identifiers()) == set(["funcdef", "funcdef_", "defnode", "def", "def_"])
 
 
+def test_identifiers_computed_once_per_class():
+    red = RedBaron("a = b")
+    assert red.find("name", "a")._get_identifiers() is red.find("name", "b")._get_identifiers()
+    assert red.find("name")._get_identifiers()[0] == frozenset(["name", "namenode", "name_"])
+    assert red.find("name")._generate_identifiers() == ("name", "name_", "namenode")
+
+
 def test_assign_node_list():
     red = RedBaron("[1, 2, 3]")
     l = red[0]
@@ -277,6 +352,30 @@ def test_node_previous_generator():
     assert list(red[0].value.node_list[2].previous_generator()) == list(reversed(red[0].value.node_list[:2]))
 
 
+def test_node_next_previous_after_modification():
+    red = RedBaron("[1, 2, 3]")
+    inner = red[0].value.node_list
+    assert inner[2].next is inner[3]
+    red[0].value.insert(1, "4")
+    assert [x.value for x in red[0].value] == [1, 4, 2, 3]
+    assert red[0].value[0].next.next is red[0].value[1]
+    assert red[0].value[2].previous is red[0].value.node_list[3]
+    assert list(red[0].value[2].previous_generator())[1] is red[0].value[1]
+    assert red[0].value[2].index_on_parent == 2
+    assert red[0].value[2].index_on_parent_raw == 4
+    red[0].value.pop(0)
+    assert red[0].value[0].previous is None
+    assert red[0].value[1].index_on_parent_raw == 2
+    assert red[0].value[-1].next is None
+
+
+def test_node_next_previous_data_modified_directly():
+    red = RedBaron("a\nb\nc\n")
+    red.node_list.data.reverse()
+    assert [x.next for x in red.node_list] == list(red.node_list[1:]) + [None]
+    assert [x.index_on_parent_raw for x in red.node_list] == list(range(len(red.node_list)))
+
+
 def test_map():
     red = RedBaron("[1, 2, 3]")
     assert red('int').map(lambda x: x.value) == NodeList([1, 2, 3])
@@ -529,6 +628,50 @@ def test_default_test_value_find_class():
     assert red.find("class", "b") == red.find("class", name="b")
 
 
+def test_compile_query():
+    red = RedBaron("def a(): pass\nplop\npop\npouf\nabcd")
+    query = compile_query("name", value="g:po*")
+    assert red.find(query) == red.find("name", value="g:po*")
+    assert red(query) == red("name", value="g:po*")
+    assert red.node_list.find_all(query) == red("name", value="g:po*")
+    assert red.find_all(compile_query("re:^[nd]", lambda x: x.type != "def")) == red("name")
+    assert red.find_all(compile_query("def", "a"), recursive=False) == [red[0]]
+    assert red.find("pass").parent_find(compile_query("def")) is red[0]
+
+
+def test_iter_find_all():
+    red = RedBaron("a = b + c\ndef d(): e")
+    assert list(red.iter_find_all("name")) == list(red.find_all("name"))
+    assert list(red[1].iter_find_all("name")) == list(red[1].find_all("name"))
+    assert list(red.node_list.iter_find_all("name", "re:[bc]")) == list(red("name", "re:[bc]"))
+    assert list(red.iter_find_all("def", recursive=False)) == [red[1]]
+    found = red[0].iter_find_all("name")
+    assert next(found) is red[0].target
+    assert next(found) is red[0].value.first
+
+
+def test_find_skips_subtrees_until_modified():
+    red = RedBaron("def f():\n    a = [1, 2]\n")
+    assert red[0].find("dict") is None
+    assert len(red[0].find_all("int")) == 2
+    red[0].value[0].value.value.append("{b: c}")
+    assert red[0].find("dict") is red[0].value[0].value.value[2]
+    red.find("int").replace("{d: e}")
+    assert len(red[0].find_all(["dict", "int"])) == 3
+    assert red[0].find_all("int") == [red[0].value[0].value.value[1]]
+
+
+def test_deeply_nested_code():
+    source = "a = " + "{1: " * 500 + "b" + "}" * 500 + "\n"
+    red = RedBaron(source)
+    assert red.dumps() == source
+    assert red.copy().dumps() == source
+    assert len(red.find_all("dict")) == 500
+    assert red.find("name", "b") is red.find_all("name")[-1]
+    assert red.find("name", "b").next_rendered is red.find_all("dict")[-1]
+    assert red[0].value.fst()["type"] == "dict"
+
+
 def test_copy_correct_isntance():
     red = RedBaron("a()")
     assert isinstance(red[0].value[1].copy(), CallNode)
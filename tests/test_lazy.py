@@ -0,0 +1,67 @@
+#!/usr/bin/python
+# -*- coding:Utf-8 -*-
+
+""" Tests the lazy construction of the tree """
+
+from redbaron import RedBaron, NodeList
+
+
+code = """\
+@deco
+def a(c, d=1):
+    b = c + d
+    return [b, c]
+
+class A(object):
+    def b(self):
+        pass
+"""
+
+
+def test_lazy_dumps():
+    assert RedBaron(code, lazy=True).dumps() == code
+
+
+def test_lazy_fst():
+    assert RedBaron(code, lazy=True).fst() == RedBaron(code).fst()
+
+
+def test_lazy_children_not_built():
+    red = RedBaron(code, lazy=True)
+    assert "value" in red[0]._pending_fst
+
+
+def test_lazy_materialize_on_access():
+    red = RedBaron(code, lazy=True)
+    value = red[0].value
+    assert "value" not in red[0]._pending_fst
+    assert value is red[0].value
+    assert value.parent is red[0]
+    assert value.node_list[1].type == "assignment"
+    assert value.node_list[1]._pending_fst
+
+
+def test_lazy_proxy_list():
+    red = RedBaron(code, lazy=True)
+    red[0].value.append("x = 42")
+    assert red[0].value[-1].dumps() == "x = 42"
+
+
+def test_lazy_key_none():
+    red = RedBaron("return", lazy=True)
+    assert red[0].value is None
+
+
+def test_lazy_find_all():
+    assert RedBaron(code, lazy=True).find_all("name").map(lambda x: x.value) == RedBaron(code).find_all("name").map(lambda x: x.value)
+
+
+def test_lazy_setattr_before_access():
+    red = RedBaron("a = b", lazy=True)
+    red[0].value = "c"
+    assert "value" not in red[0]._pending_fst
+    assert red.dumps() == "a = c"
+
+
+def test_lazy_nodelist():
+    assert isinstance(RedBaron("a = [1, 2]", lazy=True)[0].value.value.node_list, NodeList)
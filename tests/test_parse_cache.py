@@ -0,0 +1,60 @@
+#!/usr/bin/python
+# -*- coding:Utf-8 -*-
+
+""" Tests the on disk parse cache """
+
+import os
+
+import baron
+import redbaron
+from redbaron import RedBaron
+
+
+def test_parse_cache_stores_fst(tmpdir):
+    cache_dir = str(tmpdir.join("cache"))
+    red = RedBaron("a = 1\n", cache_dir=cache_dir)
+    assert red.dumps() == "a = 1\n"
+    assert len(os.listdir(cache_dir)) == 1
+
+
+def test_parse_cache_hit_does_not_parse(tmpdir, monkeypatch):
+    cache_dir = str(tmpdir)
+    RedBaron("def f(x):\n    return x\n", cache_dir=cache_dir)
+
+    def parse(source_code):
+        raise AssertionError("baron.parse shouldn't be called")
+
+    monkeypatch.setattr(baron, "parse", parse)
+    red = RedBaron("def f(x):\n    return x\n", cache_dir=cache_dir)
+    assert red.dumps() == "def f(x):\n    return x\n"
+    assert red.find("return").value.value == "x"
+
+
+def test_parse_cache_key_depends_on_source(tmpdir):
+    cache_dir = str(tmpdir)
+    RedBaron("a = 1\n", cache_dir=cache_dir)
+    red = RedBaron("b = 2\n", cache_dir=cache_dir)
+    assert red.dumps() == "b = 2\n"
+    assert len(os.listdir(cache_dir)) == 2
+
+
+def test_parse_cache_key_depends_on_versions(tmpdir, monkeypatch):
+    cache_dir = str(tmpdir)
+    RedBaron("a = 1\n", cache_dir=cache_dir)
+    monkeypatch.setattr(redbaron, "_distribution_version", lambda name: "42")
+    RedBaron("a = 1\n", cache_dir=cache_dir)
+    assert len(os.listdir(cache_dir)) == 2
+
+
+def test_parse_cache_ignores_corrupted_file(tmpdir):
+    cache_dir = str(tmpdir)
+    RedBaron("a = 1\n", cache_dir=cache_dir)
+    tmpdir.join(os.listdir(cache_dir)[0]).write("{")
+    assert RedBaron("a = 1\n", cache_dir=cache_dir).dumps() == "a = 1\n"
+
+
+def test_from_file(tmpdir):
+    path = tmpdir.join("a.py")
+    path.write("import os\n")
+    assert RedBaron.from_file(str(path)).dumps() == "import os\n"
+    assert RedBaron.from_file(str(path), cache_dir=str(tmpdir.join("cache"))).dumps() == "import os\n"
@@ -211,3 +211,17 @@ def test_path_value_second_endl(red):
             [0, "value", 2]
         )
 
+
+
+def test_path_cached_until_modification(red):
+    node = red.def_.value.node_list[1].value.first
+    check_path(red, node, [0, "value", 1, "value", "first"])
+    assert red.node_list._paths is not None
+    path = node.path().to_baron_path()
+    path.append("plop")
+    check_path(red, node, [0, "value", 1, "value", "first"])
+    red.def_.value.insert(0, "a = 1")
+    assert red.node_list._paths is None
+    check_path(red, node, [0, "value", 3, "value", "first"])
+    red.insert(0, "import os")
+    check_path(red, node, [2, "value", 3, "value", "first"])
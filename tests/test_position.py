@@ -60,3 +60,17 @@ def test_find_by_position(position_fixture):
     for position in positions:
         assert node == fst.find_by_position(position)
 
+
+
+def test_find_by_positions():
+    assert fst.find_by_positions([(3, 7), (4, 13), (2, 0)]) == [fst.def_.arguments.node_list[0].target, fst.def_.value.node_list[1].value.second, fst]
+
+
+def test_find_by_position_after_modification():
+    red = RedBaron("a = 1\nb = 2\n")
+    assert red.find_by_position((2, 5)) is red[1].value
+    red[0].target = "abcd"
+    assert red.find_by_position((1, 6)) is red[0]
+    red.insert(0, "c = 3")
+    assert red.find_by_position((3, 5)) is red[2].value
+    assert red[2].find_by_position((1, 1)) is red[2].target
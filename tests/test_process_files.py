@@ -0,0 +1,63 @@
+#!/usr/bin/python
+# -*- coding:Utf-8 -*-
+
+""" Tests the process_files() helper """
+
+from redbaron import process_files
+
+
+def rename_a_to_b(red):
+    for i in red.find_all("name", "a"):
+        i.value = "b"
+    return len(red)
+
+
+def fail(red):
+    raise ValueError("oups")
+
+
+def write_files(tmpdir, sources):
+    paths = []
+    for position, source in enumerate(sources):
+        path = tmpdir.join("file%s.py" % position)
+        path.write(source)
+        paths.append(str(path))
+    return paths
+
+
+def test_process_files_in_current_process(tmpdir):
+    paths = write_files(tmpdir, ["a = 1\n", "c = 2\nd = 3\n"])
+    results = process_files(paths, rename_a_to_b, workers=1)
+    assert [x.path for x in results] == paths
+    assert [x.result for x in results] == [1, 2]
+    assert [x.modified for x in results] == [True, False]
+    assert [x.error for x in results] == [None, None]
+    assert open(paths[0]).read() == "b = 1\n"
+    assert open(paths[1]).read() == "c = 2\nd = 3\n"
+
+
+def test_process_files_with_workers(tmpdir):
+    paths = write_files(tmpdir, ["a = %s\n" % x for x in range(10)])
+    results = process_files(paths, rename_a_to_b, workers=2, chunksize=3)
+    assert [x.path for x in results] == paths
+    assert all(x.modified for x in results)
+    assert [open(x).read() for x in paths] == ["b = %s\n" % x for x in range(10)]
+
+
+def test_process_files_no_write(tmpdir):
+    paths = write_files(tmpdir, ["a = 1\n"])
+    results = process_files(paths, rename_a_to_b, workers=1, write=False)
+    assert results[0].modified
+    assert open(paths[0]).read() == "a = 1\n"
+
+
+def test_process_files_errors(tmpdir):
+    paths = write_files(tmpdir, ["a = 1\n", "a = (\n"])
+    results = process_files(paths, fail, workers=2)
+    assert "ValueError: oups" in results[0].error
+    assert results[1].error is not None
+    assert results[1].result is None
+    results = process_files(paths, rename_a_to_b, workers=1)
+    assert results[0].error is None
+    assert results[1].error is not None
+    assert open(paths[1]).read() == "a = (\n"
@@ -1214,3 +1214,69 @@ def test_regression_first_method_of_a_class_decorators_append():
     red = RedBaron("class A:\n    def foo():\n        pass")
     red.def_.decorators.append("@staticmethod")
     assert red.dumps() == "class A:\n    @staticmethod\n    def foo():\n        pass\n"
+
+
+def test_comma_proxy_list_modification_keeps_other_nodes():
+    red = RedBaron("[1, 2, 3]")
+    comma_proxy_list = red[0].value
+    commas = [x for x in comma_proxy_list.node_list if x.type == "comma"]
+    comma_proxy_list.insert(1, "4")
+    assert red.dumps() == "[1, 4, 2, 3]"
+    new_commas = [x for x in comma_proxy_list.node_list if x.type == "comma"]
+    assert new_commas[0] is commas[0]
+    assert new_commas[2] is commas[1]
+    assert [comma_proxy_list[i].index_on_parent_raw for i in (0, 2, 3)] == [0, 4, 6]
+    commas[-1].second_formatting[0].value = "   "
+    comma_proxy_list.append("5")
+    assert red.dumps() == "[1, 4, 2, 3, 5]"
+
+
+def test_comma_proxy_list_many_appends():
+    red = RedBaron("[]")
+    comma_proxy_list = red[0].value
+    for i in range(500):
+        comma_proxy_list.append(str(i))
+    assert red.dumps() == "[%s]" % ", ".join(map(str, range(500)))
+    assert len(comma_proxy_list.node_list) == 999
+
+
+def test_comma_proxy_list_batch():
+    red = RedBaron("[1, 2, 3]")
+    comma_proxy_list = red[0].value
+    with comma_proxy_list.batch():
+        comma_proxy_list.append("4")
+        comma_proxy_list.insert(0, "0")
+        comma_proxy_list.pop(2)
+        assert red.dumps() == "[1, 2, 3]"
+        assert [x.value for x in comma_proxy_list] == [0, 1, 3, 4]
+    assert red.dumps() == "[0, 1, 3, 4]"
+
+
+def test_root_as_line_proxy_list_batch():
+    red = RedBaron("a\nb\n")
+    with red.batch():
+        for i in range(3):
+            red.append("c%d" % i)
+        with red.batch():
+            red.pop(0)
+        assert red.dumps() == "a\nb\n"
+    assert red.dumps() == "b\nc0\nc1\nc2\n"
+
+
+def test_comma_proxy_list_indented_appends():
+    red = RedBaron("[\n    1,\n]")
+    comma_proxy_list = red[0].value
+    comma_proxy_list.append("2")
+    comma_proxy_list.extend(["3", "4"])
+    assert red.dumps() == "[\n    1,\n    2,\n    3,\n    4,\n]"
+
+
+def test_line_proxy_list_append_after_modification():
+    red = RedBaron("def f():\n    a\n")
+    line_proxy_list = red.def_.value
+    line_proxy_list.append("b")
+    line_proxy_list.extend(["c", "d"])
+    red.find("name", "b").next_rendered.indent = ""
+    assert red.dumps() == "def f():\n    a\n    b\nc\n    d\n"
+    line_proxy_list.append("e")
+    assert red.dumps() == "def f():\n    a\n    b\n    c\n    d\n    e\n"
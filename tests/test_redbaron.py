@@ -35,3 +35,23 @@ def test_truncate():
     assert "1...6" == truncate("123456", 5)
     assert "123456...0" == truncate("12345678901234567890", 10)
 
+
+
+def test_find_all_type_index():
+    red = RedBaron("def a(b):\n    return b\n\ndef c():\n    pass\n")
+    assert list(red.find_all("def")) == list(red.node_list.find_all("def"))
+    assert list(red("name", value="b")) == list(red.node_list("name", value="b"))
+    assert list(red.find_all("funcdef", "c")) == [red[1]]
+    assert red._type_index is not None
+
+
+def test_find_all_type_index_dropped_on_modification():
+    red = RedBaron("def a(b):\n    return b\n")
+    assert len(red.find_all("def")) == 1
+    red.append("def c():\n    pass\n")
+    assert red._type_index is None
+    assert len(red.find_all("def")) == 2
+    red.find("return").value = "d + e"
+    assert len(red.find_all("name")) == 3
+    red.find("binary_operator").replace("f")
+    assert len(red.find_all("name")) == 2
@@ -3,6 +3,8 @@
 
 """ Tests the rendering feature """
 
+import baron
+from io import StringIO
 from redbaron import RedBaron
 
 
@@ -45,3 +47,60 @@ def test_next_rendered_trapped():
     red = RedBaron(test_indent_code)
     assert red("endl")[5].next_rendered is red.find("name", "pouf")
 
+
+
+def test_next_previous_rendered_after_modification():
+    red = RedBaron("a + 2")
+    assert red.int.next_rendered is None
+    red[0].second = "b(c)"
+    assert red[0].second_formatting[0].next_rendered is red.atomtrailers
+    assert red.call.previous_rendered is red.find("name", "b")
+    red.insert(0, "d")
+    assert red[1].previous_rendered is red.node_list[1]
+
+
+def test_rendering_order_is_cached_on_root():
+    red = RedBaron("def a():\n    return 42\n")
+    assert red.int.next_rendered is red.def_.value.node_list[-1]
+    assert red.node_list._rendering_order is not None
+    red.def_.value.append("b")
+    assert red.node_list._rendering_order is None
+    assert red.int.next_rendered is red.def_.value.node_list[2]
+
+
+def test_dumps_without_fst():
+    code = "@deco\ndef a(b, c=1, *d, **e):\n    return [x for x in b if x]\n\nclass B(A):\n    pass\n"
+    red = RedBaron(code)
+    assert red.dumps() == code
+    assert red.def_.dumps() == baron.dumps(red.def_.fst())
+    assert red.def_.arguments.dumps() == "b, c=1, *d, **e"
+    red.def_.value.append("c = 42")
+    red.class_.inherit_from = ""
+    assert red.dumps() == baron.dumps(red.fst())
+    assert red.def_.value[-1].value.dumps() == "42"
+
+
+def test_dump_to_file_object():
+    code = "def a(b):\n    return b + 1\n"
+    red = RedBaron(code)
+    fp = StringIO()
+    red.dump(fp)
+    assert fp.getvalue() == code
+    fp = StringIO()
+    red.def_.value.dump(fp)
+    red.return_.value.dump(fp)
+    assert fp.getvalue() == red.def_.value.dumps() + "b + 1"
+
+
+def test_dumps_cached_until_modification():
+    red = RedBaron("def a():\n    return b\n\nc = 1\n")
+    assert red.dumps() == "def a():\n    return b\n\nc = 1\n"
+    assert red.def_._rendered == "def a():\n    return b\n\n"
+    assert red.assignment._rendered == "c = 1"
+    red.find("name", "b").value = "d"
+    assert red.def_._rendered is None
+    assert red.return_._rendered is None
+    assert red.assignment._rendered == "c = 1"
+    assert red.dumps() == "def a():\n    return d\n\nc = 1\n"
+    red.def_.value.append("e")
+    assert red.dumps() == baron.dumps(red.fst())